@@ -0,0 +1,192 @@
+"""
+Amino-level pre-filtering of restriction enzyme patterns. A pattern can only
+be written where the local aminos can be back-translated into it, which can
+be checked with set lookups before any base-level matching.
+"""
+
+import base_utils
+import codons
+import itertools
+
+# patterns expanding into more amino k-mers than this are checked slot by
+# slot instead of through the k-mer table
+_MAX_KMERS = 4096
+
+
+class _KmerGroup(object):
+    """The patterns spanning the same number of codons from the same phase."""
+
+    def __init__(self):
+        # tuple of amino ids -> set of keys
+        self.kmers = {}
+        # list of (list of frozenset of amino ids per slot, key), for
+        # patterns with too many k-mers to list
+        self.wildcards = []
+        # every key in the group
+        self.keys = set()
+
+
+class AminoIndex(object):
+    """
+    For a set of base patterns, the amino k-mers (per reading frame phase)
+    that could encode each pattern under a CodonContext. Finds the offsets
+    at which a pattern could possibly be written, from the amino ids of a
+    sequence, or of a protein with no DNA at all.
+
+    Codons of unknown amino (e.g. containing '_') only match themselves, so
+    offsets near them are always reported as candidates.
+    """
+
+    def __init__(self, keyed_patterns, context):
+        """
+        :param keyed_patterns: iterable of (key, masks) pairs, where masks is
+            a tuple of base bitmasks (see Sequence.get_masks)
+        :param context: CodonContext
+        """
+        self._context = context
+        amino_ids, _ = context.get_code_tables()
+        self._amino_ids = amino_ids
+        # known amino id -> the primitive codons encoding it. (Degenerate
+        # synonyms can't hold any slice their primitive forms can't.)
+        self._codons = {}
+        for bases in itertools.product('ACGT', repeat=3):
+            bases = ''.join(bases)
+            self._codons.setdefault(
+                amino_ids[codons.get_codon_code(bases)], []).append(bases)
+        self._amino_names = {context.get_amino(bases[0]): amino
+                             for amino, bases in self._codons.items()}
+        # (start, slice masks) -> frozenset of amino ids (see _get_slots)
+        self._slots = {}
+
+        self.max_len = 0
+        # key -> registration order, for listing candidates
+        self._order = {}
+        # (phase, slot count) -> _KmerGroup
+        self._groups = {}
+        for key, masks in keyed_patterns:
+            self._order.setdefault(key, len(self._order))
+            self.max_len = max(self.max_len, len(masks))
+            for phase in range(3):
+                slots = self._get_slots(masks, phase)
+                group = self._groups.setdefault((phase, len(slots)),
+                                                _KmerGroup())
+                group.keys.add(key)
+                kmer_count = 1
+                for slot in slots:
+                    kmer_count *= len(slot)
+                if kmer_count > _MAX_KMERS:
+                    group.wildcards.append((slots, key))
+                    continue
+                for kmer in itertools.product(*slots):
+                    group.kmers.setdefault(kmer, set()).add(key)
+
+    def _get_slots(self, masks, phase):
+        """
+        :return: list of frozenset of the amino ids with a codon that can
+            hold each codon-sized slice of the pattern, from the phase
+        """
+        slots = []
+        begin = 0
+        start = phase
+        while begin < len(masks):
+            end = min(len(masks), begin + 3 - start)
+            slice_masks = masks[begin:end]
+            if (start, slice_masks) not in self._slots:
+                self._slots[(start, slice_masks)] = frozenset(
+                    amino for amino, codon_list in self._codons.items()
+                    if any(all(base_utils.PRIMITIVE_MASKS[base] & mask
+                               for base, mask in zip(
+                                   codon[start:start + len(slice_masks)],
+                                   slice_masks))
+                           for codon in codon_list))
+            slots.append(self._slots[(start, slice_masks)])
+            begin = end
+            start = 0
+        return slots
+
+    def get_protein_ids(self, aminos):
+        """
+        :param aminos: iterable of amino names, as in the encodings (e.g. a
+            string of one-letter aminos)
+        :return: list of amino ids
+        :raises ValueError: if an amino isn't in the encodings
+        """
+        amino_ids = []
+        for amino in aminos:
+            if amino not in self._amino_names:
+                raise ValueError('unrecognized amino "{}"'.format(amino))
+            amino_ids.append(self._amino_names[amino])
+        return amino_ids
+
+    def find(self, lattice, begin=0, end=None):
+        """
+        Finds the offsets at which a pattern could be written onto the
+        lattice's sequence: a superset of the offsets where
+        CodonLattice.get_codon_fills succeeds.
+
+        :param lattice: CodonLattice, under this index's CodonContext
+        :param begin: the first offset to check
+        :param end: the offset to stop checking at (defaults to the end)
+        :return: list of (offset, list of keys) candidates, ordered by
+            offset, then by the order the keys were given in
+        """
+        if end is None:
+            end = len(lattice)
+        begin = max(0, begin)
+        end = min(end, len(lattice))
+        if begin >= end:
+            return []
+        first_codon = begin // 3
+        last_codon = min(len(lattice), end + self.max_len + 2) // 3
+        bases = lattice.bases
+        amino_ids = []
+        for i in range(first_codon * 3, last_codon * 3, 3):
+            amino = self._amino_ids[codons.get_codon_code(bases[i:i + 3])]
+            amino_ids.append(amino if amino in self._codons else None)
+        return [(offset, keys) for offset, keys in self._merge(
+            self._find(amino_ids, first_codon)) if begin <= offset < end]
+
+    def find_protein_sites(self, amino_ids):
+        """
+        Finds the sites that some back-translation of a protein could hold.
+        (Exact, as every codon of a protein is free to change.)
+
+        :param amino_ids: list of amino ids (see get_protein_ids)
+        :return: list of (offset, list of keys) pairs, ordered as by find,
+            where offset is the base position in the back-translated sequence
+        """
+        return self._merge(self._find(amino_ids, 0))
+
+    def _merge(self, candidates):
+        """
+        :param candidates: iterable of (offset, iterable of keys)
+        :return: list of (offset, list of keys), with one entry per offset,
+            ordered by offset, then by key registration
+        """
+        merged = {}
+        for offset, keys in candidates:
+            merged.setdefault(offset, set()).update(keys)
+        return [(offset, sorted(merged[offset], key=self._order.get))
+                for offset in sorted(merged.keys())]
+
+    def _find(self, amino_ids, first_codon):
+        """
+        :param amino_ids: list of amino ids (None for unknown aminos) of
+            consecutive codons
+        :param first_codon: the codon index of amino_ids[0]
+        :return: generator of (offset, set of keys) candidates
+        """
+        for (phase, slot_count), group in self._groups.items():
+            for i in range(len(amino_ids) - slot_count + 1):
+                window = tuple(amino_ids[i:i + slot_count])
+                offset = (first_codon + i) * 3 + phase
+                if None in window:
+                    yield offset, group.keys
+                    continue
+                keys = group.kmers.get(window)
+                if keys:
+                    yield offset, keys
+                for slots, key in group.wildcards:
+                    if all(amino in slot
+                           for amino, slot in zip(window, slots)):
+                        yield offset, (key,)
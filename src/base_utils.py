@@ -1,6 +1,7 @@
 PRIMITIVE_BASES = frozenset(['A', 'C', 'G', 'T', 'U', '_'])
 DEGENERATE_BASES = frozenset(['B', 'D', 'H', 'K', 'M', 'N', 'R', 'S', 'V', 'W', 'Y'])
 ALL_BASES = frozenset.union(PRIMITIVE_BASES, DEGENERATE_BASES)
+PRIMITIVE_MASKS = {'A': 1, 'C': 2, 'G': 4, 'T': 8, '_': 16}
 
 
 def get_primitives(base):
@@ -33,3 +34,75 @@ def get_primitives(base):
         return ['A', 'C', 'G']
     if base == 'N':
         return ['A', 'C', 'G', 'T']
+
+
+def get_mask(base):
+    """
+    :param base: a single-character base representation (case insensitive)
+    :return: bitmask of all primitive bases the input can represent
+        (see PRIMITIVE_MASKS)
+    """
+    mask = 0
+    for primitive in get_primitives(base):
+        mask |= PRIMITIVE_MASKS[primitive]
+    return mask
+
+
+BASE_MASKS = {base: get_mask(base) for base in ALL_BASES}
+
+
+# complementary base of every IUPAC base (SWN_ are their own complements)
+_COMPLEMENTS = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A', 'U': 'A', '_': '_',
+                'R': 'Y', 'Y': 'R', 'K': 'M', 'M': 'K', 'B': 'V', 'V': 'B',
+                'D': 'H', 'H': 'D', 'S': 'S', 'W': 'W', 'N': 'N'}
+
+# translation tables, for single-pass operations on str and bytes
+_STR_COMPLEMENT_TABLE = str.maketrans(_COMPLEMENTS)
+_BYTES_COMPLEMENT_TABLE = bytes.maketrans(
+    ''.join(_COMPLEMENTS.keys()).encode('ascii'),
+    ''.join(_COMPLEMENTS.values()).encode('ascii'))
+_STR_DELETE_BASES = str.maketrans('', '', ''.join(ALL_BASES))
+_BYTES_BASES = ''.join(ALL_BASES).encode('ascii')
+_STR_DELETE_PRIMITIVES = str.maketrans('', '', ''.join(PRIMITIVE_BASES))
+_BYTES_PRIMITIVES = ''.join(PRIMITIVE_BASES).encode('ascii')
+BYTES_UPPER_TABLE = bytes.maketrans(b'abcdefghijklmnopqrstuvwxyz',
+                                    b'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+def complement(bases):
+    """
+    :param bases: str or bytes of upper-case IUPAC bases
+    :return: the complement of each base, of the same type (U becomes A)
+    """
+    if isinstance(bases, str):
+        return bases.translate(_STR_COMPLEMENT_TABLE)
+    return bases.translate(_BYTES_COMPLEMENT_TABLE)
+
+
+def reverse_complement(bases):
+    """
+    :param bases: str or bytes of upper-case IUPAC bases
+    :return: the reverse complement of the bases, of the same type
+    """
+    return complement(bases)[::-1]
+
+
+def get_unrecognized(bases):
+    """
+    :param bases: str or bytes
+    :return: the characters that aren't upper-case IUPAC bases, of the same
+        type (empty if all bases are valid)
+    """
+    if isinstance(bases, str):
+        return bases.translate(_STR_DELETE_BASES)
+    return bases.translate(None, _BYTES_BASES)
+
+
+def is_primitive(bases):
+    """
+    :param bases: str or bytes of upper-case IUPAC bases
+    :return: whether every base is primitive (see PRIMITIVE_BASES)
+    """
+    if isinstance(bases, str):
+        return not bases.translate(_STR_DELETE_PRIMITIVES)
+    return not bases.translate(None, _BYTES_PRIMITIVES)
@@ -0,0 +1,367 @@
+"""
+Parallel screening of many sequences against many restriction enzymes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+from wobble_cut_detector import WobbleCutDetector
+import codons
+import collections
+import contextlib
+import edit_scoring
+
+# per-process state, installed by _init_worker
+_worker_enzymes = None
+_worker_detector = None
+
+
+def screen_records(records, restriction_enzymes, workers=1,
+                   max_results=None, max_bases_modified=None, cache=None,
+                   chunk_size=None):
+    """
+    Screens each record for cuts by each enzyme. With several workers, the
+    (record, enzyme) pairs are distributed across a process pool; results
+    are still yielded in input order, one record at a time.
+
+    :param records: iterable of FastaRecord
+    :param restriction_enzymes: list of RestrictionEnzyme
+    :param workers: the number of worker processes (1 screens in-process)
+    :param max_results: max edits per enzyme (see detect_cuts)
+    :param max_bases_modified: max bases per edit (see detect_cuts)
+    :param cache: optional ResultCache, which is checked before screening
+        and updated with new results
+    :param chunk_size: if set, each record is screened in chunks of this
+        many bases, which are spread across the workers (see screen_chunked)
+    :return: generator of (record, AlignedSequence, dict of RestrictionEnzyme
+        -> List of SequenceReplacementEdit) tuples
+    """
+    if chunk_size is not None:
+        # one screener (and pool) for every record
+        screener = _ChunkScreener(restriction_enzymes, workers)
+        try:
+            for record in records:
+                aligned_sequence = record.sequence.align()
+                yield record, aligned_sequence, _screen_cached(
+                    cache, aligned_sequence, restriction_enzymes,
+                    max_results, max_bases_modified,
+                    lambda missing: screener.screen(
+                        aligned_sequence, missing, chunk_size, max_results,
+                        max_bases_modified))
+        finally:
+            screener.close()
+        return
+
+    if workers == 1:
+        detector = WobbleCutDetector()
+        for record in records:
+            aligned_sequence = record.sequence.align()
+            yield record, aligned_sequence, _screen_cached(
+                cache, aligned_sequence, restriction_enzymes, max_results,
+                max_bases_modified, lambda missing: detector.detect_cuts_multi(
+                    aligned_sequence, missing, max_results,
+                    max_bases_modified))
+        return
+
+    with create_executor(workers, restriction_enzymes) as executor:
+        # bound the records in flight, so memory doesn't grow with the input
+        pending = collections.deque()
+        for record in records:
+            aligned_sequence = record.sequence.align()
+            cuts = _get_cached(cache, aligned_sequence, restriction_enzymes,
+                               max_results, max_bases_modified)
+            # one work unit per record, screening every missing enzyme in a
+            # single pass
+            missing = [index
+                       for index, enzyme in enumerate(restriction_enzymes)
+                       if enzyme not in cuts]
+            future = executor.submit(
+                screen_bases, aligned_sequence.bases, missing, max_results,
+                max_bases_modified) if missing else None
+            pending.append((record, aligned_sequence, cuts,
+                            [restriction_enzymes[i] for i in missing], future))
+            if len(pending) > workers:
+                yield _collect(pending.popleft(), restriction_enzymes,
+                               max_results, max_bases_modified, cache)
+        while pending:
+            yield _collect(pending.popleft(), restriction_enzymes,
+                           max_results, max_bases_modified, cache)
+
+
+def get_chunk_bounds(length, chunk_size, overlap):
+    """
+    Splits an aligned sequence into codon-aligned chunks. Each chunk owns
+    the sites starting in its first chunk_size bases, and runs on for
+    overlap more bases (to a whole codon), so that those sites fit.
+
+    :param length: the length of the aligned sequence
+    :param chunk_size: the number of offsets owned by each chunk (rounded up
+        to whole codons)
+    :param overlap: how far a site may extend past its offset (the length
+        of the longest pattern - 1)
+    :return: generator of (begin, end, owned end) base positions, where the
+        owned ranges cover the sequence without overlapping
+    """
+    assert chunk_size > 0, 'chunk_size must be positive'
+    chunk_size += -chunk_size % 3
+    for begin in range(0, length, chunk_size):
+        owned_end = min(length, begin + chunk_size)
+        end = owned_end + overlap
+        yield begin, min(length, end + -end % 3), owned_end
+
+
+def screen_chunked(aligned_sequence, restriction_enzymes, chunk_size,
+                   workers=1, max_results=None, max_bases_modified=None):
+    """
+    Screens one long sequence in codon-aligned chunks (see get_chunk_bounds),
+    which are screened independently, and merged in the sequence's
+    coordinates. Screening only ever holds a few chunks at once, so its
+    memory depends on chunk_size rather than the sequence length. With
+    several workers, the chunks are spread across a process pool.
+
+    Equivalent to detect_cuts_multi on the whole sequence.
+
+    :param aligned_sequence: AlignedSequence
+    :param restriction_enzymes: list of RestrictionEnzyme
+    :param chunk_size: the number of bases owned by each chunk
+    :param workers: the number of worker processes (1 screens in-process)
+    :param max_results: max edits per enzyme (see detect_cuts)
+    :param max_bases_modified: max bases per edit (see detect_cuts)
+    :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit
+    """
+    screener = _ChunkScreener(restriction_enzymes, workers)
+    try:
+        return screener.screen(aligned_sequence, restriction_enzymes,
+                               chunk_size, max_results, max_bases_modified)
+    finally:
+        screener.close()
+
+
+class _ChunkScreener(object):
+    """
+    Screens sequences chunk by chunk (see screen_chunked), in-process or
+    across one executor that is reused for every sequence.
+    """
+
+    def __init__(self, restriction_enzymes, workers):
+        """
+        :param restriction_enzymes: list of RestrictionEnzyme that may be
+            screened for
+        :param workers: the number of worker processes (1 screens in-process)
+        """
+        self._workers = workers
+        self._indices = {enzyme: index
+                         for index, enzyme in enumerate(restriction_enzymes)}
+        self._detector = None
+        self._executor = None
+        if workers == 1:
+            self._detector = WobbleCutDetector()
+        else:
+            self._executor = create_executor(workers, restriction_enzymes)
+
+    def close(self):
+        """Shuts down the worker pool, if any."""
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def screen(self, aligned_sequence, restriction_enzymes, chunk_size,
+               max_results, max_bases_modified):
+        """
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzymes: list of RestrictionEnzyme (of those given
+            to the screener)
+        :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit
+            (see screen_chunked)
+        """
+        all_pairs = {enzyme: [] for enzyme in restriction_enzymes}
+        for begin, chunk_pairs in self._screen_chunks(
+                aligned_sequence.bases, restriction_enzymes, chunk_size,
+                max_results, max_bases_modified):
+            for enzyme, pairs in zip(restriction_enzymes, chunk_pairs):
+                all_pairs[enzyme].extend(
+                    (begin + offset, override) for offset, override in pairs)
+        cuts = {}
+        for enzyme in restriction_enzymes:
+            cuts[enzyme] = [
+                SequenceReplacementEdit(aligned_sequence, Sequence(override),
+                                        offset)
+                for offset, override in all_pairs[enzyme]]
+            if max_results is not None:
+                # each chunk kept its cheapest edits, in the order found, so
+                # a stable ranking keeps the cheapest of the whole sequence
+                cuts[enzyme] = \
+                    edit_scoring.rank_edits(cuts[enzyme])[:max_results]
+        return cuts
+
+    def _screen_chunks(self, bases, restriction_enzymes, chunk_size,
+                       max_results, max_bases_modified):
+        """
+        :param bases: string of aligned bases
+        :return: generator of (chunk begin, list of lists of (offset, override
+            bases) pairs), as from screen_bases, in chunk order
+        """
+        if not restriction_enzymes:
+            return
+        overlap = max(len(enzyme) for enzyme in restriction_enzymes) - 1
+        bounds = get_chunk_bounds(len(bases), chunk_size, overlap)
+        if self._executor is None:
+            for begin, end, owned_end in bounds:
+                yield begin, _screen_aligned(
+                    self._detector, Sequence(bases[begin:end]).align(),
+                    restriction_enzymes, max_results, max_bases_modified,
+                    owned_end - begin)
+            return
+
+        indices = [self._indices[enzyme] for enzyme in restriction_enzymes]
+        # bound the chunks in flight, so memory doesn't grow with the input
+        pending = collections.deque()
+        for begin, end, owned_end in bounds:
+            pending.append((begin, self._executor.submit(
+                screen_bases, bases[begin:end], indices, max_results,
+                max_bases_modified, owned_end - begin)))
+            if len(pending) > self._workers:
+                begin, future = pending.popleft()
+                yield begin, future.result()
+        while pending:
+            begin, future = pending.popleft()
+            yield begin, future.result()
+
+
+def _screen_cached(cache, aligned_sequence, restriction_enzymes, max_results,
+                   max_bases_modified, screen):
+    """
+    Screens a sequence for the enzymes without cached results, with all of
+    its cache reads and writes in a single transaction.
+
+    :param screen: function of a list of RestrictionEnzyme -> dict of
+        RestrictionEnzyme -> List of SequenceReplacementEdit
+    :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit
+    """
+    with _batched(cache):
+        cuts = _get_cached(cache, aligned_sequence, restriction_enzymes,
+                           max_results, max_bases_modified)
+        missing = [e for e in restriction_enzymes if e not in cuts]
+        if missing:
+            cuts.update(screen(missing))
+            _put_cached(cache, aligned_sequence, missing, cuts,
+                        max_results, max_bases_modified)
+    return {enzyme: cuts[enzyme] for enzyme in restriction_enzymes}
+
+
+def _batched(cache):
+    """:return: the cache's batch() context, or a no-op without a cache"""
+    return contextlib.nullcontext() if cache is None else cache.batch()
+
+
+def _get_cached(cache, aligned_sequence, restriction_enzymes, max_results,
+                max_bases_modified):
+    """
+    :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit,
+        for the enzymes with cached results
+    """
+    cuts = {}
+    if cache is None:
+        return cuts
+    with cache.batch():
+        for enzyme in restriction_enzymes:
+            edits = cache.get(aligned_sequence, enzyme, max_results,
+                              max_bases_modified)
+            if edits is not None:
+                cuts[enzyme] = edits
+    return cuts
+
+
+def _put_cached(cache, aligned_sequence, restriction_enzymes, cuts,
+                max_results, max_bases_modified):
+    """Stores the cuts for the given enzymes, if there's a cache."""
+    if cache is None:
+        return
+    with cache.batch():
+        for enzyme in restriction_enzymes:
+            cache.put(aligned_sequence, enzyme, cuts[enzyme], max_results,
+                      max_bases_modified)
+
+
+def _collect(pending_record, restriction_enzymes, max_results,
+             max_bases_modified, cache):
+    """
+    Waits for a record's work unit, and rebuilds its edits.
+
+    :param pending_record: tuple of (record, AlignedSequence, cached cuts,
+        list of the screened RestrictionEnzymes, future of screen_bases or
+        None)
+    :param restriction_enzymes: list of RestrictionEnzyme
+    :return: tuple of (record, AlignedSequence, dict of cuts)
+    """
+    record, aligned_sequence, cuts, screened, future = pending_record
+    if future is not None:
+        for enzyme, pairs in zip(screened, future.result()):
+            cuts[enzyme] = [
+                SequenceReplacementEdit(aligned_sequence, Sequence(override),
+                                        offset)
+                for offset, override in pairs]
+        _put_cached(cache, aligned_sequence, screened, cuts, max_results,
+                    max_bases_modified)
+    return record, aligned_sequence, {
+        enzyme: cuts[enzyme] for enzyme in restriction_enzymes}
+
+
+def create_executor(workers, restriction_enzymes):
+    """
+    :param workers: the number of workers (1 runs work in a single thread
+        of this process)
+    :param restriction_enzymes: list of RestrictionEnzyme, which work units
+        refer to by index
+    :return: an Executor for screen_bases, with the loaded tables and enzymes
+        installed in its workers
+    """
+    initargs = (codons.get_state(), restriction_enzymes)
+    if workers == 1:
+        return ThreadPoolExecutor(max_workers=1, initializer=_init_worker,
+                                  initargs=initargs)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=initargs)
+
+
+def screen_bases(bases, enzyme_indices, max_results=None,
+                 max_bases_modified=None, end=None):
+    """
+    Work unit: screens one sequence for several enzymes at once. Must run in
+    an executor from create_executor.
+
+    :param bases: string of bases (aligned here)
+    :param enzyme_indices: indices of the enzymes in the workers' list
+    :param max_results: max edits per enzyme (see detect_cuts)
+    :param max_bases_modified: max bases per edit (see detect_cuts)
+    :param end: if set, only sites starting before this offset are screened
+    :return: list (indexed like enzyme_indices) of lists of (offset,
+        override bases) pairs, one per edit
+    """
+    return _screen_aligned(
+        _worker_detector, Sequence(bases).align(),
+        [_worker_enzymes[index] for index in enzyme_indices], max_results,
+        max_bases_modified, end)
+
+
+def _screen_aligned(detector, aligned_sequence, restriction_enzymes,
+                    max_results, max_bases_modified, end):
+    """
+    :return: list (indexed like restriction_enzymes) of lists of (offset,
+        override bases) pairs, one per edit (see screen_bases)
+    """
+    cuts = detector.detect_cuts_multi(
+        aligned_sequence, restriction_enzymes, max_results,
+        max_bases_modified, end=end)
+    return [[(edit.get_offset(), edit.get_override())
+             for edit in cuts[enzyme]] for enzyme in restriction_enzymes]
+
+
+def _init_worker(codon_state, restriction_enzymes):
+    """Installs the parent's loaded tables and enzymes in a worker process."""
+    global _worker_enzymes
+    global _worker_detector
+    codons.set_state(codon_state)
+    _worker_enzymes = restriction_enzymes
+    _worker_detector = WobbleCutDetector()
+
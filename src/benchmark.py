@@ -0,0 +1,198 @@
+"""
+Benchmarks for the detection hot path, on seeded synthetic workloads.
+
+Usage (from this directory):
+    python benchmark.py [sizes=1000,10000] [panel=26] [seed=0] [memory=1]
+                        [baseline=<json path>] [save=<json path>]
+                        [tolerance=0.2] [repeats=5]
+
+Reports throughput (bases/s) and peak traced memory for each benchmark.
+Each is run once to warm up (e.g. compiling patterns), then timed as the
+best of several repeats, so one slow run doesn't fail a comparison.
+With a baseline, exits non-zero if any throughput regressed by more than
+the tolerance.
+"""
+
+from restriction_enzymes import RestrictionEnzyme
+from sequence import AlignedSequence
+from sequence import Sequence
+from wobble_cut_detector import WobbleCutDetector
+import codons
+import edit_scoring
+import json
+import random
+import restriction_enzymes
+import sys
+import time
+import tracemalloc
+
+_default_args = {
+    'sizes': '1000,10000',
+    'panel': '26',
+    'seed': '0',
+    'memory': '1',
+    'baseline': None,
+    'save': None,
+    'tolerance': '0.2',
+    'repeats': '5'
+}
+
+_STOP_AMINOS = frozenset(['Amber', 'Ochre', 'Opal'])
+_PATTERN_BASES = 'ACGT' * 4 + 'RYKMSWN'
+
+
+def random_orf(length, seed=0):
+    """
+    :param length: approximate number of bases (rounded to whole codons)
+    :param seed: random seed
+    :return: AlignedSequence of a start codon, random sense codons and a
+        stop codon
+    """
+    codons.load_encodings()
+    sense = sorted(k for k, v in codons._encodings.items()
+                   if v not in _STOP_AMINOS)
+    stops = sorted(k for k, v in codons._encodings.items()
+                   if v in _STOP_AMINOS)
+    rng = random.Random(seed)
+    codon_count = max(2, length // 3)
+    return AlignedSequence(
+        'ATG' + ''.join(rng.choice(sense) for _ in range(codon_count - 2))
+        + rng.choice(stops))
+
+
+def random_panel(size, seed=0):
+    """
+    :param size: the number of enzymes
+    :param seed: random seed
+    :return: list of RestrictionEnzyme, starting with the configured enzymes
+        and padded with random (partly degenerate) 4-8 base patterns
+    """
+    panel = restriction_enzymes.get_all_enzymes()[:size]
+    rng = random.Random(seed)
+    while len(panel) < size:
+        pattern = ''.join(rng.choice(_PATTERN_BASES)
+                          for _ in range(rng.randint(4, 8)))
+        panel.append(RestrictionEnzyme('synthetic{}'.format(len(panel)),
+                                       pattern))
+    return panel
+
+
+def _measure(function, memory, repeats=5):
+    """
+    :param function: no-arg function to benchmark
+    :param memory: whether to also measure peak memory (in another run)
+    :param repeats: the number of timed runs, after an untimed warm-up run
+    :return: tuple of (seconds of the fastest run, peak traced bytes or None)
+    """
+    function()
+    seconds = None
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - begin
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmarks(sizes, panel_size, seed=0, memory=True, repeats=5):
+    """
+    :param sizes: list of sequence lengths (bases)
+    :param panel_size: the number of enzymes to screen for
+    :param seed: random seed for the workloads
+    :param memory: whether to measure peak memory
+    :param repeats: the number of timed runs per benchmark (see _measure)
+    :return: dict of benchmark name -> dict of results
+    """
+    codons.load_encodings()
+    codons.get_code_tables()
+    panel = random_panel(panel_size, seed)
+    results = {}
+    for size in sizes:
+        aligned = random_orf(size, seed)
+        bases = aligned.bases
+        detector = WobbleCutDetector()
+        cuts = detector.detect_cuts_multi(aligned, panel)
+        edits = [edit for edit_list in cuts.values() for edit in edit_list]
+        benchmarks = [
+            ('aligned_sequence', lambda: AlignedSequence(bases)),
+            ('reverse_complement',
+             lambda: Sequence(bases).reverse_complement()),
+            ('detect_cuts',
+             lambda: [detector.detect_cuts(aligned, e) for e in panel]),
+            ('detect_cuts_multi',
+             lambda: detector.detect_cuts_multi(aligned, panel)),
+            ('score_edits', lambda: edit_scoring.score_edits(edits)),
+        ]
+        for name, function in benchmarks:
+            seconds, peak = _measure(function, memory, repeats)
+            results['{}/{}/{}'.format(name, len(bases), panel_size)] = {
+                'bases': len(bases),
+                'seconds': seconds,
+                'bases_per_second': len(bases) / seconds if seconds else 0,
+                'peak_bytes': peak,
+            }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    :param results: dict returned by run_benchmarks
+    :param baseline: dict returned by an earlier run_benchmarks
+    :param tolerance: the allowed fractional drop in throughput
+    :return: list of human-readable regression descriptions
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        expected = baseline[name]['bases_per_second']
+        if result['bases_per_second'] < expected * (1 - tolerance):
+            regressions.append('{}: {:.0f} bases/s (baseline {:.0f})'.format(
+                name, result['bases_per_second'], expected))
+    return regressions
+
+
+def _get_inputs():
+    arg_dict = dict(_default_args)
+    for arg in sys.argv[1:]:
+        k, v = arg.split('=')
+        if k not in _default_args.keys():
+            raise KeyError('argument "{}" not supported'.format(k))
+        arg_dict[k] = v
+    return arg_dict
+
+
+if __name__ == '__main__':
+    inputs = _get_inputs()
+    benchmark_results = run_benchmarks(
+        [int(size) for size in inputs['sizes'].split(',')],
+        int(inputs['panel']), int(inputs['seed']), inputs['memory'] == '1',
+        int(inputs['repeats']))
+
+    for benchmark_name, benchmark_result in sorted(benchmark_results.items()):
+        peak_bytes = benchmark_result['peak_bytes']
+        print('{:<40}{:>12.4f} s{:>16.0f} bases/s{:>14}'.format(
+            benchmark_name, benchmark_result['seconds'],
+            benchmark_result['bases_per_second'],
+            '' if peak_bytes is None
+            else '{:.1f} MB'.format(peak_bytes / 1e6)))
+
+    if inputs['save']:
+        with open(inputs['save'], 'w') as outfile:
+            json.dump(benchmark_results, outfile, indent=2, sort_keys=True)
+
+    if inputs['baseline']:
+        with open(inputs['baseline'], 'r') as infile:
+            baseline_results = json.load(infile)
+        found = compare(benchmark_results, baseline_results,
+                        float(inputs['tolerance']))
+        for regression in found:
+            print('REGRESSION {}'.format(regression))
+        sys.exit(1 if found else 0)
@@ -0,0 +1,117 @@
+import base_utils
+
+# (synonyms, codon bases, start, masks) -> tuple of fills, shared by all
+# lattices
+_fills = {}
+
+
+class CodonLattice(object):
+    """
+    The synonymous-codon alternatives of an AlignedSequence, one set per codon
+    position. Lets a pattern be matched against every amino-preserving variant
+    of the sequence without building the variants.
+    """
+
+    def __init__(self, aligned_sequence, synonymous=True):
+        """
+        :param aligned_sequence: an AlignedSequence (whose CodonContext
+            determines the synonyms)
+        :param synonymous: if False, each codon only matches itself, so
+            patterns only match the sequence's existing sites
+        """
+        self.bases = aligned_sequence.bases
+        self.context = aligned_sequence.context
+        self._synonymous = synonymous
+        self.synonyms = [self._get_synonyms(self.bases[i:i + 3])
+                         for i in range(0, len(self.bases), 3)]
+
+    def _get_synonyms(self, codon):
+        """:return: frozenset of the codons that may replace the codon"""
+        if self._synonymous:
+            return self.context.get_synonyms(codon)
+        return frozenset([codon])
+
+    def update(self, bases, begin, end):
+        """
+        Points the lattice at an edited version of its bases, recomputing
+        only the codons that changed.
+
+        :param bases: the edited bases, of the same length: a string, or any
+            object whose slices are strings (e.g. a buffer edited in place)
+        :param begin: the first changed base position (codon-aligned)
+        :param end: the position after the last changed base (codon-aligned)
+        """
+        assert len(bases) == len(self.bases), \
+            'edited sequence must keep its length'
+        self.bases = bases
+        for i in range(begin, end, 3):
+            self.synonyms[i // 3] = self._get_synonyms(self.bases[i:i + 3])
+
+    def __len__(self):
+        """The number of bases in the underlying sequence"""
+        return len(self.bases)
+
+    def get_fills(self, codon_index, start, masks):
+        """
+        Returns the primitive bases that can be written into a codon (from
+        position start, matching the pattern masks) without altering its
+        amino. Bases outside the written span are kept as-is.
+
+        :param codon_index: the zero-based index of the codon
+        :param start: the position within the codon to write from (0-2)
+        :param masks: tuple of base bitmasks (see base_utils.BASE_MASKS), with
+            start + len(masks) <= 3
+        :return: sorted tuple of base strings of length len(masks)
+        """
+        codon = self.bases[codon_index * 3:codon_index * 3 + 3]
+        synonyms = self.synonyms[codon_index]
+        key = (synonyms, codon, start, masks)
+        if key not in _fills:
+            end = start + len(masks)
+            _fills[key] = tuple(sorted(
+                synonym[start:end]
+                for synonym in synonyms
+                if synonym[:start] == codon[:start]
+                and synonym[end:] == codon[end:]
+                and all(base_utils.PRIMITIVE_MASKS.get(base, 0) & mask
+                        for base, mask in zip(synonym[start:end], masks))))
+        return _fills[key]
+
+    def get_codon_fills(self, masks, offset):
+        """
+        Matches a pattern against the lattice at the offset.
+
+        :param masks: tuple of base bitmasks (see Sequence.get_masks)
+        :param offset: the zero-based base position of the pattern start
+        :return: list with a tuple of fills (see get_fills) for each codon the
+            pattern overlaps, or None if the pattern can't be written there
+        """
+        if offset + len(masks) > len(self.bases):
+            return None
+        codon_fills = []
+        begin = 0
+        while begin < len(masks):
+            position = offset + begin
+            end = min(len(masks), begin + 3 - position % 3)
+            fills = self.get_fills(position // 3, position % 3,
+                                   masks[begin:end])
+            if not fills:
+                return None
+            codon_fills.append(fills)
+            begin = end
+        return codon_fills
+
+    def get_fill_cost(self, codon_index, start, fill):
+        """
+        :param codon_index: the zero-based index of the codon
+        :param start: the position within the codon to write from (0-2)
+        :param fill: a string of bases (see get_fills)
+        :return: tuple of (bases modified, abs usage shift) of writing the
+            fill into the codon
+        """
+        codon = self.bases[codon_index * 3:codon_index * 3 + 3]
+        end = start + len(fill)
+        bases_modified = sum(a != b for a, b in zip(codon[start:end], fill))
+        new_codon = codon[:start] + fill + codon[end:]
+        return bases_modified, abs(self.context.get_usage(codon)
+                                   - self.context.get_usage(new_codon))
@@ -1,39 +1,361 @@
+from array import array
 import base_utils
 import itertools
 
 _UNKNOWN_AMINO = '?'
 
+# every IUPAC codon, indexed by its compact code (see get_codon_code)
+_CODONS = [''.join(base_list) for base_list
+           in itertools.product(sorted(base_utils.ALL_BASES), repeat=3)]
+_CODON_CODES = {bases: code for code, bases in enumerate(_CODONS)}
+
 _encodings = None
 _usage_source = None
 _usage_table = None
+# CodonContext of the loaded tables (see get_loaded_context)
+_loaded_context = None
 
 
 def load_encodings(encoding_file='encodings'):
     global _encodings
+    global _loaded_context
     if _encodings:
         return
-    _encodings = {}
+    _encodings = _read_encodings(encoding_file)
+    _loaded_context = None
+
+
+def _read_encodings(encoding_file):
+    """
+    :param encoding_file: the name of a file in configs
+    :return: dict of primitive codon -> amino
+    """
+    encodings = {}
     path = '../configs/{}.txt'.format(encoding_file)
     with open(path, 'r') as file:
         for line in file:
             k, v = line.split(': ')
-            _encodings[k] = v.strip()
+            encodings[k] = v.strip()
+    return encodings
+
+
+def _compile_amino_tables(encodings):
+    """
+    Builds the amino and synonym lookup tables for every IUPAC codon, so
+    that lookups never need to expand degenerate bases.
+
+    :param encodings: dict of primitive codon -> amino
+    :return: tuple of (dict of codon -> amino, dict of amino -> frozenset of
+        codons, array of amino ids indexed by codon code)
+    """
+    aminos = {}
+    synonyms = {}
+    for bases in _CODONS:
+        amino = _translate(bases, encodings)
+        aminos[bases] = amino
+        synonyms.setdefault(amino, set()).add(bases)
+    synonyms = {k: frozenset(v) for k, v in synonyms.items()}
+    known_aminos = sorted(k for k in synonyms.keys() if k != _UNKNOWN_AMINO)
+    amino_ids = array('H', (
+        known_aminos.index(aminos[bases]) if aminos[bases] != _UNKNOWN_AMINO
+        # unknown codons only match themselves, so each gets its own id
+        else len(known_aminos) + code
+        for code, bases in enumerate(_CODONS)))
+    return aminos, synonyms, amino_ids
+
+
+def _translate(bases, encodings):
+    """
+    :param bases: a length-three string of upper-case IUPAC bases
+    :param encodings: dict of primitive codon -> amino
+    :return: the amino encoded by every primitive form of the bases, or
+        _UNKNOWN_AMINO if there are conflicts or unmapped forms
+    """
+    options = [base_utils.get_primitives(b) for b in bases]
+    amino = None
+    for base_list in itertools.product(*options):
+        base_str = ''.join(base_list)
+        if base_str not in encodings.keys():
+            return _UNKNOWN_AMINO
+        elif amino and amino != encodings[base_str]:
+            # we've found a conflict
+            return _UNKNOWN_AMINO
+        else:
+            amino = encodings[base_str]
+    return amino
+
+
+def get_codon_code(bases):
+    """
+    :param bases: a length-three string of upper-case IUPAC bases
+    :return: a small int identifying the codon (see get_codon_bases)
+    """
+    return _CODON_CODES[bases]
+
+
+def get_codon_codes(bases):
+    """
+    :param bases: a string of upper-case IUPAC bases, with length 3n
+    :return: array of the codes of each codon in the bases
+    """
+    return array('H', [_CODON_CODES[bases[i:i + 3]]
+                       for i in range(0, len(bases), 3)])
+
+
+def get_codon_bases(code):
+    """
+    :param code: a codon code (see get_codon_code)
+    :return: the (shared) length-three string of the codon's bases
+    """
+    return _CODONS[code]
+
+
+def get_amino(bases):
+    """
+    :param bases: a length-three string of upper-case IUPAC bases
+    :return: string representation of the encoded amino acid
+        (See Codon.get_amino)
+    """
+    return get_loaded_context().get_amino(bases)
+
+
+def encodes_same_amino(bases, other_bases):
+    """
+    :param bases: a length-three string of upper-case IUPAC bases
+    :param other_bases: a length-three string of upper-case IUPAC bases
+    :return: boolean (See Codon.encodes_same_amino)
+    """
+    return get_loaded_context().encodes_same_amino(bases, other_bases)
+
+
+def get_synonyms(bases):
+    """
+    Returns every codon that encodes the same amino as the input, including
+    degenerate codons. Codons of unknown amino are only synonymous with
+    themselves. (See Codon.encodes_same_amino)
+
+    :param bases: a length-three string of upper-case IUPAC bases
+    :return: frozenset of upper-case codon strings
+    """
+    return get_loaded_context().get_synonyms(bases)
+
+
+def get_usage(bases):
+    """
+    :param bases: a length-three string of upper-case IUPAC bases
+    :return: the usage rate of the codon (0 for degenerate codons)
+    """
+    return get_loaded_context().get_usage(bases)
 
 
 def load_usage(usage_file_name='human'):
     global _usage_source
     global _usage_table
+    global _loaded_context
     if _usage_table:
         # Don't allow the table to be altered post-load
+        # (use a CodonContext to screen against several tables)
         raise RuntimeError('Already loaded usage table {}'
                            .format(_usage_source))
     _usage_source = usage_file_name
-    _usage_table = {}
+    _usage_table = _read_usage(usage_file_name)
+    # a loaded context that hasn't looked up usage yet picks up this table
+    if _loaded_context is not None \
+            and _loaded_context._usage_table is not None:
+        _loaded_context = None
+
+
+def _read_usage(usage_file_name):
+    """
+    :param usage_file_name: the name of a file in configs/usage_tables
+    :return: dict of primitive codon -> usage rate
+    """
+    usage_table = {}
     path = '../configs/usage_tables/{}.txt'.format(usage_file_name)
     with open(path, 'r') as file:
         for line in file:
             k, v = line.split(': ')
-            _usage_table[k] = float(v)
+            usage_table[k] = float(v)
+    return usage_table
+
+
+def _compile_usages(usage_table):
+    """
+    :param usage_table: dict of primitive codon -> usage rate
+    :return: array of usage rates, indexed by codon code
+    """
+    return array('d', (usage_table.get(bases, 0) for bases in _CODONS))
+
+
+def get_code_tables():
+    """
+    Returns lookup tables indexed by codon code (see get_codon_code), for
+    scoring many codons at once. Two codons encode the same amino (see
+    encodes_same_amino) iff they have the same amino id.
+
+    :return: tuple of (array of amino ids, array of usages)
+    """
+    return get_loaded_context().get_code_tables()
+
+
+def get_state():
+    """
+    Returns the loaded tables in a picklable form, for installing into
+    another process with set_state. (Loads the defaults if needed.)
+
+    :return: tuple of (encodings, usage source, usage table)
+    """
+    if not _encodings:
+        load_encodings()
+    if not _usage_table:
+        load_usage()
+    return _encodings, _usage_source, _usage_table
+
+
+def set_state(state):
+    """
+    Installs tables previously returned by get_state, replacing any that are
+    already loaded.
+
+    :param state: tuple of (encodings, usage source, usage table)
+    """
+    global _encodings
+    global _usage_source
+    global _usage_table
+    global _loaded_context
+    _encodings, _usage_source, _usage_table = state
+    _loaded_context = None
+
+
+def get_loaded_context():
+    """
+    :return: a CodonContext of the tables loaded into this module (loading
+        the default encodings if needed). Reused until other tables are
+        loaded. If no usage table is loaded yet, the context only loads one
+        on its first usage lookup, so another table may still be chosen.
+    """
+    global _loaded_context
+    if _loaded_context is None:
+        if not _encodings:
+            load_encodings()
+        _loaded_context = CodonContext(_encodings, _usage_table,
+                                       _usage_source)
+    return _loaded_context
+
+
+def load_context(encoding_file='encodings', usage_file_name='human'):
+    """
+    Loads a genetic code and usage table as a CodonContext, without touching
+    the module's loaded tables.
+
+    :param encoding_file: the name of a file in configs
+    :param usage_file_name: the name of a file in configs/usage_tables
+    :return: CodonContext
+    """
+    return CodonContext(_read_encodings(encoding_file),
+                        _read_usage(usage_file_name), usage_file_name)
+
+
+class CodonContext(object):
+    """
+    An immutable genetic code (encodings) and codon usage table, compiled
+    into lookup tables indexed by codon code. Contexts for several organisms
+    may be used side by side in one process.
+
+    Mirrors the module-level lookups (get_amino, get_synonyms, ...), which
+    use the loaded tables instead. (See get_loaded_context)
+    """
+
+    def __init__(self, encodings, usage_table, usage_source=None):
+        """
+        :param encodings: dict of primitive codon -> amino
+        :param usage_table: dict of primitive codon -> usage rate, or None
+            to use the module's loaded table (loading the default on the
+            first usage lookup)
+        :param usage_source: optional name of the usage table
+        """
+        self._encodings = dict(encodings)
+        self._aminos, self._synonyms, self._amino_ids = \
+            _compile_amino_tables(self._encodings)
+        self._usage_table = None
+        self._usage_source = usage_source
+        self._usages = None
+        if usage_table is not None:
+            self._set_usage(usage_table, usage_source)
+        # bases -> the shared Codon instance (see Codon.__new__)
+        self._interned_codons = {}
+
+    def _set_usage(self, usage_table, usage_source):
+        """Installs and compiles the usage table."""
+        self._usage_table = dict(usage_table)
+        self._usage_source = usage_source
+        self._usages = _compile_usages(self._usage_table)
+
+    def _get_usage_table(self):
+        """:return: the usage table, loading the module's if needed"""
+        if self._usage_table is None:
+            if not _usage_table:
+                load_usage()
+            self._set_usage(_usage_table, _usage_source)
+        return self._usage_table
+
+    @property
+    def usage_source(self):
+        """The name of the usage table"""
+        self._get_usage_table()
+        return self._usage_source
+
+    def __getstate__(self):
+        # interned Codons refer back to the context, so aren't pickled
+        self._get_usage_table()
+        state = self.__dict__.copy()
+        state['_interned_codons'] = {}
+        return state
+
+    def get_amino(self, bases):
+        """(See get_amino)"""
+        return self._aminos[bases]
+
+    def encodes_same_amino(self, bases, other_bases):
+        """(See encodes_same_amino)"""
+        amino = self._aminos[bases]
+        if amino == _UNKNOWN_AMINO:
+            return bases == other_bases
+        return amino == self._aminos[other_bases]
+
+    def get_synonyms(self, bases):
+        """(See get_synonyms)"""
+        amino = self._aminos[bases]
+        if amino == _UNKNOWN_AMINO:
+            return frozenset([bases])
+        return self._synonyms[amino]
+
+    def get_usage(self, bases):
+        """(See get_usage)"""
+        return self._get_usage_table().get(bases, 0)
+
+    def get_code_tables(self):
+        """(See get_code_tables)"""
+        self._get_usage_table()
+        return self._amino_ids, self._usages
+
+    def get_state(self):
+        """
+        :return: tuple of (encodings, usage source, usage table), as from
+            get_state, for rebuilding the context in another process
+        """
+        return dict(self._encodings), self.usage_source, \
+            dict(self._get_usage_table())
+
+    def has_same_encodings(self, other):
+        """
+        Whether two contexts share a genetic code, so their sequences have
+        the same synonymous variants (and differ only in usage).
+
+        :param other: CodonContext
+        :return: boolean
+        """
+        return self._encodings == other._encodings
 
 
 class Codon(object):
@@ -43,22 +365,51 @@ class Codon(object):
     stop.)
     """
 
-    def __init__(self, bases):
+    __slots__ = ('bases', 'context', '_amino', '_usage')
+
+    def __new__(cls, bases, context=None):
         """
+        Codons are interned per CodonContext: equal bases share one
+        immutable instance, with its amino and usage looked up once. (Usage
+        is only looked up when first needed.)
+
         :param bases: Any length-three string of IUPAC degenerate bases
             (case-insensitive)
+        :param context: the CodonContext to look up aminos and usage in
+            (defaults to the loaded tables)
         """
+        context = context or get_loaded_context()
+        interned = context._interned_codons.get(bases)
+        if interned is not None:
+            return interned
         assert len(bases) == 3, 'codons must have length 3!'
-        bases = bases.upper()
-        for base in bases:
+        upper = bases.upper()
+        for base in upper:
             assert base in base_utils.ALL_BASES, \
                 'unrecognized base "{}"'.format(base)
-        self.bases = bases
+        interned = context._interned_codons.get(upper)
+        if interned is None:
+            interned = super().__new__(cls)
+            for name, value in (('bases', upper), ('context', context),
+                                ('_amino', context.get_amino(upper))):
+                object.__setattr__(interned, name, value)
+            context._interned_codons[upper] = interned
+        context._interned_codons[bases] = interned
+        return interned
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Codon is immutable')
+
+    def __reduce__(self):
+        return Codon, (self.bases, self.context)
 
     def __eq__(self, other):
         """Returns true if two codons have identical bases in the same order."""
         return self.bases == other.bases
 
+    def __hash__(self):
+        return hash(self.bases)
+
     def get_amino(self):
         """
         Returns the string representation of an amino. Typically a
@@ -67,20 +418,7 @@ class Codon(object):
 
         :return: string representation of the encoded amino acid.
         """
-        if not _encodings:
-            load_encodings()
-        options = [base_utils.get_primitives(b) for b in self.bases]
-        amino = None
-        for base_list in itertools.product(*options):
-            base_str = ''.join(base_list)
-            if base_str not in _encodings.keys():
-                return _UNKNOWN_AMINO
-            elif amino and amino != _encodings[base_str]:
-                # we've found a conflict
-                return _UNKNOWN_AMINO
-            else:
-                amino = _encodings[base_str]
-        return amino
+        return self._amino
 
     def encodes_same_amino(self, other):
         """
@@ -94,20 +432,15 @@ class Codon(object):
         :param other: another codon
         :return: boolean
         """
-        this_amino = self.get_amino()
-        if this_amino == _UNKNOWN_AMINO:
-            # unmapped codons must match exactly
-            return self.bases == other.bases
-
-        return self.get_amino() == other.get_amino()
+        return self.context.encodes_same_amino(self.bases, other.bases)
 
     def get_usage(self):
         """
         :return: the usage rate of this codon (genome-dependent)
         """
-        if not _usage_table:
-            load_usage()
-        if self.bases in _usage_table.keys():
-            return _usage_table[self.bases]
-        else:
-            return 0
+        try:
+            return self._usage
+        except AttributeError:
+            object.__setattr__(self, '_usage',
+                               self.context.get_usage(self.bases))
+            return self._usage
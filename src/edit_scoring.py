@@ -0,0 +1,52 @@
+"""
+Batch scoring and ranking of candidate SequenceReplacementEdits, using the
+codon-code lookup tables rather than per-edit Codon method calls.
+"""
+
+from array import array
+import codons
+
+
+def score_edits(edits):
+    """
+    Scores many edits in one pass. Equivalent to calling
+    get_number_of_bases_modified and get_abs_usage_shift on each edit.
+
+    :param edits: list of SequenceReplacementEdit
+    :return: tuple of (array of bases modified, array of abs usage shifts),
+        indexed like edits
+    """
+    get_code = codons.get_codon_code
+    bases_modified = array('L', [0]) * len(edits)
+    usage_shifts = array('d', [0]) * len(edits)
+    sequence = None
+    for index, edit in enumerate(edits):
+        # edits usually share a sequence (and so its context's tables)
+        if edit.get_original_sequence() is not sequence:
+            sequence = edit.get_original_sequence()
+            amino_ids, usages = sequence.context.get_code_tables()
+        old = edit.get_old_bases()
+        new = edit.get_new_bases()
+        bases_modified[index] = sum(a != b for a, b in zip(old, new))
+        abs_shift = 0
+        for i in range(0, len(old), 3):
+            old_code = get_code(old[i:i + 3])
+            new_code = get_code(new[i:i + 3])
+            if amino_ids[old_code] != amino_ids[new_code]:
+                abs_shift = float('inf')
+                break
+            abs_shift += abs(usages[old_code] - usages[new_code])
+        usage_shifts[index] = abs_shift
+    return bases_modified, usage_shifts
+
+
+def rank_edits(edits):
+    """
+    :param edits: list of SequenceReplacementEdit
+    :return: a new list of the edits, sorted by fewest bases modified, then
+        lowest abs usage shift (stable for ties)
+    """
+    bases_modified, usage_shifts = score_edits(edits)
+    order = sorted(range(len(edits)),
+                   key=lambda i: (bases_modified[i], usage_shifts[i]))
+    return [edits[i] for i in order]
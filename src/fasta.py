@@ -0,0 +1,160 @@
+from sequence import AlignedSequence
+from sequence import Sequence
+import base_utils
+import gzip
+import mmap
+
+_GZIP_MAGIC = b'\x1f\x8b'
+# bytes of a mapped file processed at a time by map_sequence
+_CHUNK_SIZE = 1 << 20
+_WHITESPACE = b' \t\r\n\v\f'
+
+
+class FastaRecord(object):
+    """A named Sequence read from a FASTA file."""
+
+    def __init__(self, name, sequence):
+        """
+        :param name: the record's header line (without the leading '>')
+        :param sequence: a Sequence
+        """
+        self.name = name
+        self.sequence = sequence
+
+    def __eq__(self, other):
+        """Whether two records have identical names and sequences"""
+        return self.name == other.name and self.sequence == other.sequence
+
+
+def open_text(path):
+    """
+    Opens a (possibly gzip-compressed) text file for reading.
+
+    :param path: path to the file
+    :return: a text-mode file object
+    """
+    with open(path, 'rb') as infile:
+        magic = infile.read(len(_GZIP_MAGIC))
+    if magic == _GZIP_MAGIC:
+        return gzip.open(path, 'rt')
+    return open(path, 'r')
+
+
+def read_records(path):
+    """
+    Streams the records of a FASTA or multi-FASTA file (optionally gzipped),
+    one at a time. Only the current record is held in memory.
+
+    :param path: path to the file
+    :return: generator of FastaRecord
+    """
+    with open_text(path) as infile:
+        for record in parse_records(infile):
+            yield record
+
+
+def parse_records(lines):
+    """
+    :param lines: iterable of FASTA-formatted lines
+    :return: generator of FastaRecord
+    """
+    name = None
+    chunks = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('>'):
+            if name is not None:
+                yield FastaRecord(name, Sequence(''.join(chunks)))
+            name = line[1:].strip()
+            chunks = []
+        elif line and not line.startswith(';'):
+            if name is None:
+                raise ValueError('FASTA sequence data before first header')
+            chunks.append(line)
+    if name is not None:
+        yield FastaRecord(name, Sequence(''.join(chunks)))
+
+
+def map_sequence(path, aligned=False):
+    """
+    Loads a single sequence from a plain or FASTA-formatted (uncompressed)
+    file through a memory map. Header and comment lines are skipped (see
+    parse_records), and the bases of every record are joined into one
+    sequence, so large inputs are read without building per-line strings.
+
+    :param path: path to the file
+    :param aligned: whether to pad the bases to whole codons (see
+        Sequence.align) before building the sequence, so they aren't copied
+        again to align them
+    :return: Sequence, or AlignedSequence if aligned
+    :raises ValueError: if the file contains unrecognized bases
+    """
+    bases = bytearray()
+    with open(path, 'rb') as infile:
+        try:
+            mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            mapped = None
+        if mapped is not None:
+            with mapped:
+                begin = 0
+                for line_begin, line_end in _iter_skipped_lines(mapped):
+                    _add_bases(bases, mapped, begin, line_begin)
+                    begin = line_end
+                _add_bases(bases, mapped, begin, len(mapped))
+    if not aligned:
+        return Sequence(bases.decode('ascii'))
+    bases += b'_' * (-len(bases) % 3)
+    text = bases.decode('ascii')
+    # drop the buffer before the codons are packed
+    del bases
+    return AlignedSequence(text)
+
+
+def _iter_skipped_lines(mapped):
+    """
+    :param mapped: mmap of a FASTA-formatted file
+    :return: generator of the (begin, end) offsets of the header ('>') and
+        comment (';') lines, in order. (Markers within a line are data.)
+    """
+    positions = {marker: mapped.find(marker) for marker in (b'>', b';')}
+    while True:
+        found = [(position, marker) for marker, position in positions.items()
+                 if position >= 0]
+        if not found:
+            return
+        position, marker = min(found)
+        line_begin = mapped.rfind(b'\n', 0, position) + 1
+        if mapped[line_begin:position].strip():
+            positions[marker] = mapped.find(marker, position + 1)
+            continue
+        line_end = mapped.find(b'\n', position)
+        line_end = len(mapped) if line_end < 0 else line_end + 1
+        yield position, line_end
+        for marker, position in positions.items():
+            if 0 <= position < line_end:
+                positions[marker] = mapped.find(marker, line_end)
+
+
+def _add_bases(bases, mapped, begin, end):
+    """
+    Appends the cleaned bases of mapped[begin:end] to a bytearray, a chunk
+    at a time.
+    """
+    for i in range(begin, end, _CHUNK_SIZE):
+        bases += _clean_chunk(mapped[i:min(end, i + _CHUNK_SIZE)])
+
+
+def _clean_chunk(chunk):
+    """
+    :param chunk: bytes of sequence data
+    :return: the chunk's bases, upper-cased and without whitespace
+    :raises ValueError: if the chunk contains unrecognized bases
+    """
+    cleaned = chunk.translate(base_utils.BYTES_UPPER_TABLE, _WHITESPACE)
+    invalid = base_utils.get_unrecognized(cleaned)
+    if invalid:
+        raise ValueError('unrecognized base "{}"'.format(
+            chr(invalid[0]) if invalid[0] < 128 else hex(invalid[0])))
+    return cleaned
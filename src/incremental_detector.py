@@ -0,0 +1,120 @@
+from codon_lattice import CodonLattice
+from sequence import AlignedSequence
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+from wobble_cut_detector import WobbleCutDetector
+
+
+class IncrementalCutDetector(object):
+    """
+    Tracks the wobble cuts of a sequence for a panel of enzymes across a
+    series of edits. Applying an edit only rewrites the edited bases in place
+    and re-screens the offsets whose patterns could overlap the edited
+    codons, so its cost depends on the length of the edit and the patterns,
+    not of the sequence. The edited AlignedSequence and its cuts are only
+    built on request. (See get_sequence and get_cuts)
+    """
+
+    def __init__(self, aligned_sequence, restriction_enzymes, detector=None):
+        """
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param detector: WobbleCutDetector to reuse compiled patterns from
+        """
+        self._context = aligned_sequence.context
+        self._bases = _BaseBuffer(aligned_sequence.bases)
+        # the current AlignedSequence and cuts, or None until requested
+        self._sequence = aligned_sequence
+        self._cuts = None
+        self._enzymes = list(restriction_enzymes)
+        self._detector = detector or WobbleCutDetector()
+        self._max_len = max([len(e) for e in self._enzymes] + [0])
+        self._lattice = CodonLattice(aligned_sequence)
+        # enzyme -> dict of offset -> list of override bases
+        self._hits = {enzyme: {} for enzyme in self._enzymes}
+        self._add_hits(0, len(aligned_sequence))
+
+    def get_sequence(self):
+        """
+        :return: the current AlignedSequence (with all edits applied)
+        """
+        if self._sequence is None:
+            self._sequence = AlignedSequence(str(self._bases), self._context)
+        return self._sequence
+
+    def get_cuts(self):
+        """
+        :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit
+            against the current sequence (as from detect_cuts_multi)
+        """
+        if self._cuts is None:
+            sequence = self.get_sequence()
+            self._cuts = {enzyme: [
+                SequenceReplacementEdit(sequence, Sequence(override), offset)
+                for offset in sorted(self._hits[enzyme].keys())
+                for override in self._hits[enzyme][offset]]
+                for enzyme in self._enzymes}
+        return self._cuts
+
+    def apply(self, edit):
+        """
+        Applies an edit to the current sequence, and re-screens the window it
+        affects.
+
+        :param edit: SequenceReplacementEdit whose old bases are those of the
+            current sequence (e.g. from get_cuts)
+        :return: dict of RestrictionEnzyme -> list of (offset, override bases)
+            pairs of the re-screened window, ordered by offset (the cuts
+            elsewhere are unchanged)
+        """
+        begin, end = edit.get_edit_range()
+        assert len(edit.get_original_sequence()) == len(self._bases) \
+            and edit.get_old_bases() == self._bases[begin:end], \
+            'edit must be based on the current sequence'
+        self._bases[begin:end] = edit.get_new_bases()
+        self._sequence = None
+        self._cuts = None
+        self._lattice.update(self._bases, begin, end)
+
+        # any pattern overlapping [begin, end) could have changed
+        window_begin = max(0, begin - self._max_len + 1)
+        for offsets in self._hits.values():
+            for offset in range(window_begin, end):
+                offsets.pop(offset, None)
+        self._add_hits(window_begin, end)
+        return {enzyme: [(offset, override)
+                         for offset in range(window_begin, end)
+                         for override in self._hits[enzyme].get(offset, [])]
+                for enzyme in self._enzymes}
+
+    def _add_hits(self, begin, end):
+        """Screens the offsets in [begin, end), recording their hits."""
+        for offset, override, enzyme in self._detector.detect_overrides(
+                self._lattice, self._enzymes, begin, end):
+            self._hits[enzyme].setdefault(offset, []).append(override)
+
+
+class _BaseBuffer(object):
+    """Bases that can be rewritten in place, and slice into strings."""
+
+    __slots__ = ('_buffer',)
+
+    def __init__(self, bases):
+        """
+        :param bases: string of bases
+        """
+        self._buffer = bytearray(bases, 'ascii')
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._buffer[index].decode('ascii')
+        return chr(self._buffer[index])
+
+    def __setitem__(self, index, bases):
+        self._buffer[index] = bases.encode('ascii')
+
+    def __str__(self):
+        return self._buffer.decode('ascii')
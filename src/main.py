@@ -4,20 +4,39 @@ sequence, allowing for base substitutions (provided that the resulting amino
 acid chain remains unaltered.
 """
 
+from fasta import FastaRecord
+from result_cache import ResultCache
 from sequence import Sequence
-from wobble_cut_detector import WobbleCutDetector
+import batch
 import codons
+import edit_scoring
+import fasta
+import output_writers
+import server
 import os
 import sys
 import restriction_enzymes as enzymes
 
 _default_args = {
     'sequence': 'sequence',
+    'fasta': None,
     'usage': 'human',
     'encodings': 'encodings',
-    'restriction_enzymes': 'restriction_enzymes'
+    'restriction_enzymes': 'restriction_enzymes',
+    'workers': '1',
+    'max_results': None,
+    'max_bases_modified': None,
+    'cache': None,
+    'format': 'text',
+    'output': None,
+    'serve': None,
+    'chunk_size': None
 }
 
+# args naming files relative to the caller's working directory (rather than
+# config names, which are resolved against this file's location)
+_path_args = ['fasta', 'output', 'cache']
+
 
 def _set_pwd_to_main():
     """Sets pwd to this file's location to ensure relative config paths work."""
@@ -25,6 +44,13 @@ def _set_pwd_to_main():
     os.chdir(os.path.dirname(main_path))
 
 
+def _resolve_paths(inputs):
+    """Makes the path args absolute, so they survive _set_pwd_to_main."""
+    for key in _path_args:
+        if inputs[key]:
+            inputs[key] = os.path.abspath(inputs[key])
+
+
 def _get_inputs():
     arg_dict = _default_args
     args = sys.argv[1:]
@@ -44,42 +70,87 @@ def _get_inputs():
 
 
 def _load_sequence(sequence_file):
-    seq = ''
-    with open('../configs/{}.txt'.format(sequence_file), 'r') as infile:
-        for line in infile:
-            seq += line
-    return Sequence(seq).align()
+    return fasta.map_sequence('../configs/{}.txt'.format(sequence_file),
+                              aligned=True)
 
 
-if __name__ == '__main__':
-    _set_pwd_to_main()
-    inputs = _get_inputs()
+def _get_optional_int(inputs, key):
+    """
+    :param inputs: dict of parsed args (see _get_inputs)
+    :param key: the arg name
+    :return: the arg as an int, or None if it wasn't given
+    """
+    return None if inputs[key] is None else int(inputs[key])
 
-    codons.load_encodings(inputs['encodings'])
-    codons.load_usage(inputs['usage'])
-    aligned_seq = None
+
+def _get_records(inputs):
+    """
+    :param inputs: dict of parsed args (see _get_inputs)
+    :return: iterable of FastaRecord to screen
+    """
     if 'literal_sequence' in inputs.keys():
-        aligned_seq = Sequence(inputs['literal_sequence']).align()
-    else:
-        aligned_seq = _load_sequence(inputs['sequence'])
-
-    print('Original base sequence:\n{}'.format(aligned_seq))
-    print()
-    print('Original amino chain: \n\t{}'.format(aligned_seq.get_amino_string()))
-    print()
-    print('Checking sequence for potential cuts (leaving aminos unchanged)...')
-    print('(usage table: {})'.format(codons._usage_source))
-    print()
-
-    wobbler = WobbleCutDetector()
-
-    for enzyme in enzymes.get_all_enzymes():
-        wobble_cuts = wobbler.detect_cuts(aligned_seq, enzyme)
-        wobble_cuts.sort(key=lambda cut: (
-            cut.get_number_of_bases_modified(), cut.get_abs_usage_shift()))
+        return [FastaRecord('literal_sequence',
+                            Sequence(inputs['literal_sequence']))]
+    if inputs['fasta']:
+        return fasta.read_records(inputs['fasta'])
+    return [FastaRecord(inputs['sequence'],
+                        _load_sequence(inputs['sequence']))]
+
+
+def _print_cuts(aligned_seq, all_enzymes, all_cuts, output=sys.stdout):
+    print('Original base sequence:\n{}'.format(aligned_seq), file=output)
+    print(file=output)
+    print('Original amino chain: \n\t{}'.format(aligned_seq.get_amino_string()),
+          file=output)
+    print(file=output)
+    print('Checking sequence for potential cuts (leaving aminos unchanged)...',
+          file=output)
+    print('(usage table: {})'.format(codons._usage_source), file=output)
+    print(file=output)
+
+    for enzyme in all_enzymes:
+        wobble_cuts = edit_scoring.rank_edits(all_cuts[enzyme])
         if len(wobble_cuts) > 0:
-            print('possible cuts for {}:'.format(enzyme.name))
+            print('possible cuts for {}:'.format(enzyme.name), file=output)
             for cut_edit in wobble_cuts:
-                print('  {}'.format(cut_edit))
+                print('  {}'.format(cut_edit), file=output)
 
-            print()
+            print(file=output)
+
+
+if __name__ == '__main__':
+    inputs = _get_inputs()
+    _resolve_paths(inputs)
+    _set_pwd_to_main()
+
+    codons.load_encodings(inputs['encodings'])
+    codons.load_usage(inputs['usage'])
+    all_enzymes = enzymes.get_all_enzymes()
+    if inputs['serve']:
+        server.serve(all_enzymes, inputs['serve'], int(inputs['workers']))
+        sys.exit()
+
+    result_cache = ResultCache(inputs['cache']) if inputs['cache'] else None
+    output = open(inputs['output'], 'w') if inputs['output'] else sys.stdout
+    writer = None
+    if inputs['format'] != 'text':
+        writer = output_writers.get_writer(inputs['format'], output)
+
+    for record, aligned_seq, all_cuts in batch.screen_records(
+            _get_records(inputs), all_enzymes, int(inputs['workers']),
+            _get_optional_int(inputs, 'max_results'),
+            _get_optional_int(inputs, 'max_bases_modified'), result_cache,
+            _get_optional_int(inputs, 'chunk_size')):
+        if writer:
+            writer.write_record(record.name, aligned_seq, all_enzymes,
+                                all_cuts)
+            continue
+        if inputs['fasta']:
+            print('>{}'.format(record.name), file=output)
+        _print_cuts(aligned_seq, all_enzymes, all_cuts, output)
+        output.flush()
+
+    if output is not sys.stdout:
+        output.close()
+    if result_cache:
+        result_cache.close()
@@ -0,0 +1,171 @@
+"""
+Machine-readable writers for detected cuts. Each writer streams one record
+at a time, and flushes after every record, so downstream tools can consume
+results while a large screen is still running.
+"""
+
+import base_utils
+import edit_scoring
+import json
+
+# column order of tabular output
+FIELDS = ('sequence', 'enzyme', 'strand', 'offset', 'old_bases', 'new_bases',
+          'bases_changed', 'usage_shift')
+
+
+def get_strand(edit, restriction_enzyme):
+    """
+    :param edit: SequenceReplacementEdit writing the enzyme's site
+    :param restriction_enzyme: RestrictionEnzyme
+    :return: '+' if the override matches the enzyme's pattern (including
+        symmetric patterns), or '-' if it only matches its reverse complement
+    """
+    override = edit.get_override()
+    masks = restriction_enzyme.sequence.get_masks()
+    if all(base_utils.BASE_MASKS[base] & mask
+           for base, mask in zip(override, masks)):
+        return '+'
+    return '-'
+
+
+def get_rows(name, restriction_enzymes, all_cuts):
+    """
+    :param name: the name of the screened sequence
+    :param restriction_enzymes: list of RestrictionEnzyme, in output order
+    :param all_cuts: dict of RestrictionEnzyme -> List of
+        SequenceReplacementEdit
+    :return: generator of dicts, keyed by FIELDS, one per edit
+    """
+    for enzyme in restriction_enzymes:
+        edits = all_cuts[enzyme]
+        bases_modified, usage_shifts = edit_scoring.score_edits(edits)
+        for i, edit in enumerate(edits):
+            yield {
+                'sequence': name,
+                'enzyme': enzyme.name,
+                'strand': get_strand(edit, enzyme),
+                'offset': edit.get_offset(),
+                'old_bases': edit.get_old_bases(),
+                'new_bases': edit.get_new_bases(),
+                'bases_changed': bases_modified[i],
+                'usage_shift': round(usage_shifts[i], 6),
+                # not a field: the length of the written site
+                'length': len(edit.get_override())
+            }
+
+
+def _get_id(name):
+    """:return: the first word of a record name, as used by BED and GenBank"""
+    words = name.split()
+    return words[0] if words else 'unnamed'
+
+
+class OutputWriter(object):
+    """Base class of the streaming writers. (See get_writer)"""
+
+    def __init__(self, stream):
+        """
+        :param stream: writable text file object
+        """
+        self._stream = stream
+
+    def write_record(self, name, aligned_sequence, restriction_enzymes,
+                     all_cuts):
+        """
+        Writes and flushes the cuts of one screened sequence.
+
+        :param name: the name of the sequence
+        :param aligned_sequence: the screened AlignedSequence
+        :param restriction_enzymes: list of RestrictionEnzyme, in output order
+        :param all_cuts: dict of RestrictionEnzyme -> List of
+            SequenceReplacementEdit
+        """
+        self._write_rows(name, aligned_sequence,
+                         get_rows(name, restriction_enzymes, all_cuts))
+        self._stream.flush()
+
+    def _write_rows(self, name, aligned_sequence, rows):
+        raise NotImplementedError
+
+
+class JsonLinesWriter(OutputWriter):
+    """Writes one JSON object per edit."""
+
+    def _write_rows(self, name, aligned_sequence, rows):
+        for row in rows:
+            self._stream.write(json.dumps(
+                {field: row[field] for field in FIELDS}) + '\n')
+
+
+class TsvWriter(OutputWriter):
+    """Writes tab-separated rows of FIELDS, after a header line."""
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._stream.write('\t'.join(FIELDS) + '\n')
+
+    def _write_rows(self, name, aligned_sequence, rows):
+        for row in rows:
+            self._stream.write(
+                '\t'.join(str(row[field]) for field in FIELDS) + '\n')
+
+
+class BedWriter(OutputWriter):
+    """
+    Writes BED6 intervals of the written sites, named by enzyme and scored
+    by bases changed.
+    """
+
+    def _write_rows(self, name, aligned_sequence, rows):
+        for row in rows:
+            self._stream.write('{}\t{}\t{}\t{}\t{}\t{}\n'.format(
+                _get_id(name), row['offset'], row['offset'] + row['length'],
+                row['enzyme'], min(row['bases_changed'], 1000),
+                row['strand']))
+
+
+class GenBankWriter(OutputWriter):
+    """
+    Writes a GenBank feature table per sequence, with a misc_feature per
+    edit, qualified by the edit's details.
+    """
+
+    def _write_rows(self, name, aligned_sequence, rows):
+        self._stream.write('LOCUS       {} {} bp    DNA\n'.format(
+            _get_id(name), len(aligned_sequence)))
+        self._stream.write('FEATURES             Location/Qualifiers\n')
+        for row in rows:
+            location = '{}..{}'.format(row['offset'] + 1,
+                                       row['offset'] + row['length'])
+            if row['strand'] == '-':
+                location = 'complement({})'.format(location)
+            self._stream.write('     misc_feature    {}\n'.format(location))
+            for key, value in (
+                    ('note', '{} wobble cut site'.format(row['enzyme'])),
+                    ('old_bases', row['old_bases']),
+                    ('new_bases', row['new_bases']),
+                    ('bases_changed', row['bases_changed']),
+                    ('usage_shift', row['usage_shift'])):
+                self._stream.write('                     /{}="{}"\n'.format(
+                    key, value))
+        self._stream.write('//\n')
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'tsv': TsvWriter,
+    'bed': BedWriter,
+    'genbank': GenBankWriter
+}
+
+
+def get_writer(output_format, stream):
+    """
+    :param output_format: a key of WRITERS
+    :param stream: writable text file object
+    :return: OutputWriter
+    """
+    if output_format not in WRITERS:
+        raise KeyError('output format "{}" not supported'.format(
+            output_format))
+    return WRITERS[output_format](stream)
@@ -1,4 +1,5 @@
 from sequence import Sequence
+import base_utils
 
 _enzymes = None
 
@@ -8,6 +9,8 @@ class RestrictionEnzyme(object):
     A restriction enzyme, which will cut any DNA sequence matching a pattern.
     """
 
+    __slots__ = ('name', 'sequence')
+
     def __init__(self, name, base_sequence):
         """
         :param name: the name of the enzyme
@@ -31,7 +34,8 @@ class RestrictionEnzyme(object):
 
         :return: boolean
         """
-        return self.sequence == self.sequence.reverse_complement()
+        bases = self.sequence.bases
+        return bases == base_utils.reverse_complement(bases)
 
 
 def load_enzymes(enzyme_file):
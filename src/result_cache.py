@@ -0,0 +1,147 @@
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+import contextlib
+import hashlib
+import json
+import sqlite3
+import time
+
+
+class ResultCache(object):
+    """
+    A persistent, content-addressed store of detected cuts, backed by SQLite.
+
+    Entries are keyed by a hash of the aligned bases, the enzyme pattern, the
+    detection options and the loaded encodings and usage table, so a result
+    is only served for an identical screen. The least recently used entries
+    are evicted once the cache holds more than max_entries.
+
+    Each get or put is committed on its own, unless it's made within batch().
+    """
+
+    def __init__(self, path, max_entries=100000):
+        """
+        :param path: path to the SQLite database file (created if missing)
+        :param max_entries: the number of results to keep
+        """
+        self._max_entries = max_entries
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, edits TEXT NOT NULL, '
+            'last_used REAL NOT NULL)')
+        # eviction picks the least recently used entries
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS results_last_used '
+            'ON results (last_used)')
+        self._connection.commit()
+        self._count = self._connection.execute(
+            'SELECT COUNT(*) FROM results').fetchone()[0]
+        # CodonContext -> digest of its tables (see _get_key)
+        self._table_digests = {}
+        # (bases, digest) of the last sequence keyed, as a record's enzymes
+        # are looked up and stored one after another
+        self._sequence_digest = (None, None)
+        self._batch_depth = 0
+
+    def __len__(self):
+        """The number of cached results"""
+        return self._count
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Groups the gets and puts made within it (e.g. those of one record)
+        into a single transaction, committed on exit.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._connection.commit()
+
+    def _commit(self):
+        """Commits, unless within batch()."""
+        if not self._batch_depth:
+            self._connection.commit()
+
+    def close(self):
+        """Closes the underlying database."""
+        self._connection.close()
+
+    def get(self, aligned_sequence, restriction_enzyme, max_results=None,
+            max_bases_modified=None):
+        """
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzyme: RestrictionEnzyme
+        :param max_results: see WobbleCutDetector.detect_cuts
+        :param max_bases_modified: see WobbleCutDetector.detect_cuts
+        :return: List of SequenceReplacementEdit, or None if not cached
+        """
+        key = self._get_key(aligned_sequence, restriction_enzyme,
+                            max_results, max_bases_modified)
+        row = self._connection.execute(
+            'SELECT edits FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._connection.execute(
+            'UPDATE results SET last_used = ? WHERE key = ?',
+            (time.time(), key))
+        self._commit()
+        return [SequenceReplacementEdit(aligned_sequence, Sequence(override),
+                                        offset)
+                for offset, override in json.loads(row[0])]
+
+    def put(self, aligned_sequence, restriction_enzyme, edits,
+            max_results=None, max_bases_modified=None):
+        """
+        Stores the edits detected for a sequence and enzyme, evicting the
+        least recently used results if the cache is full.
+
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzyme: RestrictionEnzyme
+        :param edits: List of SequenceReplacementEdit
+        :param max_results: see WobbleCutDetector.detect_cuts
+        :param max_bases_modified: see WobbleCutDetector.detect_cuts
+        """
+        key = self._get_key(aligned_sequence, restriction_enzyme,
+                            max_results, max_bases_modified)
+        value = json.dumps([[edit.get_offset(), edit.get_override()]
+                            for edit in edits])
+        if self._connection.execute(
+                'SELECT 1 FROM results WHERE key = ?', (key,)).fetchone() \
+                is None:
+            self._count += 1
+        self._connection.execute(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+            (key, value, time.time()))
+        excess = self._count - self._max_entries
+        if excess > 0:
+            self._count -= self._connection.execute(
+                'DELETE FROM results WHERE key IN ('
+                'SELECT key FROM results ORDER BY last_used LIMIT ?)',
+                (excess,)).rowcount
+        self._commit()
+
+    def _get_key(self, aligned_sequence, restriction_enzyme, max_results,
+                 max_bases_modified):
+        """
+        :return: hex digest identifying a screen's inputs
+        """
+        context = aligned_sequence.context
+        if context not in self._table_digests:
+            encodings, _, usage_table = context.get_state()
+            self._table_digests[context] = hashlib.sha256(json.dumps([
+                sorted(encodings.items()),
+                sorted(usage_table.items())]).encode()).hexdigest()
+        bases, sequence_digest = self._sequence_digest
+        if bases is not aligned_sequence.bases:
+            bases = aligned_sequence.bases
+            sequence_digest = hashlib.sha256(bases.encode()).hexdigest()
+            self._sequence_digest = (bases, sequence_digest)
+        return hashlib.sha256(json.dumps([
+            restriction_enzyme.sequence.bases, max_results,
+            max_bases_modified, self._table_digests[context],
+            sequence_digest]).encode()).hexdigest()
@@ -1,24 +1,28 @@
 from codons import Codon
 import base_utils
+import codons
+import copy
 import itertools
 
 
 class Sequence(object):
     """A sequence of nucleic acid bases. May be unaligned."""
 
+    __slots__ = ('bases',)
+
     def __init__(self, base_sequence_str):
         """
         :param base_sequence_str: any case-insensitive string of IUPAC bases.
             (Accepts base patterns such as 'N' for 'any base'.)
         """
 
-        # Convert to upper
-        base_sequence_str = base_sequence_str.upper()
-
-        # Check that bases are valid
-        for base in base_sequence_str:
-            assert base in base_utils.ALL_BASES, \
-                'unrecognized base "{}"'.format(base)
+        # Check that bases are valid, converting to upper only if needed (so
+        # large, already-clean inputs aren't copied)
+        if base_utils.get_unrecognized(base_sequence_str):
+            base_sequence_str = base_sequence_str.upper()
+            unrecognized = base_utils.get_unrecognized(base_sequence_str)
+            assert not unrecognized, \
+                'unrecognized base "{}"'.format(unrecognized[0])
 
         self.bases = base_sequence_str
 
@@ -37,14 +41,14 @@ class Sequence(object):
         """The number of bases in the Sequence"""
         return len(self.bases)
 
-    def align(self):
+    def align(self, context=None):
         """
+        :param context: the CodonContext of the aligned sequence (see
+            AlignedSequence)
         :return: AlignedSequence obtained by right-padding the Sequence with _'s
         """
-        bases_copy = self.bases
-        while len(bases_copy) % 3 != 0:
-            bases_copy += '_'
-        return AlignedSequence(bases_copy)
+        return AlignedSequence(self.bases + '_' * (-len(self.bases) % 3),
+                               context)
 
     def reverse_complement(self):
         """
@@ -53,28 +57,11 @@ class Sequence(object):
 
         :returns: the reverse complement Sequence
         """
-        return Sequence(self.bases
-                        .replace('A', 't')
-                        .replace('T', 'a')
-                        .replace('U', 'a')
-                        .replace('C', 'g')
-                        .replace('G', 'c')
-                        .replace('R', 'y')
-                        .replace('Y', 'r')
-                        .replace('K', 'm')
-                        .replace('M', 'k')
-                        .replace('B', 'v')
-                        .replace('V', 'B')
-                        .replace('D', 'h')
-                        .replace('H', 'd')
-                        .replace('G', 'c')
-                        # (SWN_ remain the same)
-                        .upper()
-                        [::-1])
+        return Sequence(base_utils.reverse_complement(self.bases))
 
     def is_degenerate(self):
         """Whether the Sequence contains any non-standard bases. (not ACGTU_)"""
-        return any(b for b in self.bases if b not in base_utils.PRIMITIVE_BASES)
+        return not base_utils.is_primitive(self.bases)
 
     def get_primitive_sequences(self):
         """
@@ -90,16 +77,34 @@ class Sequence(object):
         options = [base_utils.get_primitives(b) for b in self.bases]
         return [Sequence(''.join(x)) for x in itertools.product(*options)]
 
+    def get_masks(self):
+        """
+        Returns the pattern as per-base bitmasks, which represent degenerate
+        bases without enumerating primitive sequences.
+
+        Example:
+            Sequence('ANT') -> (1, 15, 8)
+        :return: tuple of int (see base_utils.BASE_MASKS)
+        """
+        return tuple(base_utils.BASE_MASKS[b] for b in self.bases)
+
 
 class AlignedSequence(Sequence):
     """
     A Sequence composed of complete, aligned codons.
     Can be translated into a chain of amino acids.
+
+    Codons are stored as a packed array of codon codes, and Codon objects are
+    only created when accessed. (See AlignedSequence.codons)
     """
 
-    def __init__(self, base_sequence):
+    __slots__ = ('_codon_codes', '_context')
+
+    def __init__(self, base_sequence, context=None):
         """
         :param base_sequence: case-insensitive string of ACGT_, with length 3n
+        :param context: the CodonContext to translate and score the codons
+            with (defaults to the loaded tables)
         """
         super().__init__(base_sequence)
 
@@ -107,17 +112,36 @@ class AlignedSequence(Sequence):
         assert len(base_sequence) % 3 == 0, \
             'AlignedSequence with len {}'.format(len(base_sequence))
 
-        self.codons = []
+        self._codon_codes = codons.get_codon_codes(self.bases)
+        self._context = context
+
+    @property
+    def context(self):
+        """The CodonContext of the sequence"""
+        return self._context or codons.get_loaded_context()
+
+    def with_context(self, context):
+        """
+        :param context: CodonContext
+        :return: the same sequence under another context, sharing its bases
+            and codon codes
+        """
+        shared = copy.copy(self)
+        shared._context = context
+        return shared
 
-        for i in range(0, len(base_sequence), 3):
-            codon = Codon(base_sequence[i:i + 3])
-            self.codons.append(codon)
+    @property
+    def codons(self):
+        """
+        :return: a read-only list-like view of the sequence's Codons
+        """
+        return _CodonView(self._codon_codes, self._context)
 
     def __str__(self):
         """Returns a human-readable representation of the base sequence"""
         output = ''
         base_count = 0
-        for codon in self.codons:
+        for code in self._codon_codes:
             if base_count % 10 == 0:
                 if base_count > 0:
                     output += '\n'
@@ -126,7 +150,7 @@ class AlignedSequence(Sequence):
                 output += ' : '
             else:
                 output += ' '
-            output += codon.bases
+            output += codons.get_codon_bases(code)
             base_count += 3
         return output
 
@@ -135,11 +159,13 @@ class AlignedSequence(Sequence):
         :return: string representation of the AlignedSequence's amino chain,
             with readability separators
         """
+        context = self.context
         output = ''
-        for i in range(len(self.codons)):
+        for i in range(len(self._codon_codes)):
             if i % 5 == 0 and i > 0:
                 output += ' : '
-            output += self.codons[i].get_amino()
+            output += context.get_amino(
+                codons.get_codon_bases(self._codon_codes[i]))
         return output
 
     def encodes_same_aminos(self, other):
@@ -147,9 +173,44 @@ class AlignedSequence(Sequence):
         :param other: AlignedSequence
         :return: True iff two sequences represent an identical amino acid chain
         """
-        if len(self.codons) != len(other.codons):
+        if len(self._codon_codes) != len(other._codon_codes):
             return False
-        for left, right in zip(self.codons, other.codons):
-            if not left.encodes_same_amino(right):
+        context = self.context
+        for left, right in zip(self._codon_codes, other._codon_codes):
+            if left != right and not context.encodes_same_amino(
+                    codons.get_codon_bases(left),
+                    codons.get_codon_bases(right)):
                 return False
         return True
+
+
+class _CodonView(object):
+    """A read-only sequence of Codons, created on demand from codon codes."""
+
+    __slots__ = ('_codon_codes', '_context')
+
+    def __init__(self, codon_codes, context=None):
+        """
+        :param codon_codes: array of codon codes (see codons.get_codon_code)
+        :param context: the CodonContext of the Codons
+        """
+        self._codon_codes = codon_codes
+        self._context = context
+
+    def __len__(self):
+        return len(self._codon_codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Codon(codons.get_codon_bases(code), self._context)
+                    for code in self._codon_codes[index]]
+        return Codon(codons.get_codon_bases(self._codon_codes[index]),
+                     self._context)
+
+    def __iter__(self):
+        for code in self._codon_codes:
+            yield Codon(codons.get_codon_bases(code), self._context)
+
+    def __eq__(self, other):
+        """Whether the Codons match those of another sequence of Codons"""
+        return list(self) == list(other)
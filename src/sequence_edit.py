@@ -1,4 +1,3 @@
-from codons import Codon
 from sequence import AlignedSequence
 
 
@@ -6,8 +5,15 @@ class SequenceReplacementEdit(object):
     """
     Represents a specific transformation of one one aligned nucleic acid
     sequence to another using single-base replacements.
+
+    Edits are stored as an overlay on the original sequence, so their cost
+    depends on the length of the override, not the sequence. The edited
+    sequence is only built on request. (See get_new_sequence)
     """
 
+    __slots__ = ('_original_sequence', '_override', '_offset', '_new_sequence',
+                 '_edit_begin', '_edit_end')
+
     def __init__(self, aligned_sequence, override_sequence, offset):
         """
         :param aligned_sequence: an AlignedSequence
@@ -18,31 +24,40 @@ class SequenceReplacementEdit(object):
         assert offset + len(override_sequence) <= len(aligned_sequence), \
             'override_sequence doesn\'t fit in aligned_sequence with offset'
         self._original_sequence = aligned_sequence
-        edited_bases = aligned_sequence.bases[:offset] \
-                       + override_sequence.bases \
-                       + aligned_sequence.bases[
-                         offset + len(override_sequence):]
-        self._new_sequence = AlignedSequence(edited_bases)
-        self._edit_begin = offset
+        self._override = override_sequence.bases
+        self._offset = offset
+        self._new_sequence = None
         # align to codon begin
-        while self._edit_begin % 3 != 0:
-            self._edit_begin -= 1
-        self._edit_end = offset + len(override_sequence)
+        self._edit_begin = offset - offset % 3
         # align to codon end
-        while self._edit_end % 3 != 0:
-            self._edit_end += 1
+        self._edit_end = offset + len(override_sequence)
+        self._edit_end += -self._edit_end % 3
 
     def __eq__(self, other):
         """Whether two edits have identical before/after AlignedSequences"""
-        return self._original_sequence == other._original_sequence \
-               and self._new_sequence == other._new_sequence
+        if self._original_sequence != other._original_sequence:
+            return False
+        begin = min(self._edit_begin, other._edit_begin)
+        end = max(self._edit_end, other._edit_end)
+        return self._get_new_bases(begin, end) \
+            == other._get_new_bases(begin, end)
+
+    def __hash__(self):
+        """
+        Hashes the bases the edit actually changes, so edits writing the
+        same result through different windows hash alike. (See __eq__)
+        """
+        bases = self._original_sequence.bases
+        return hash((self._original_sequence, tuple(
+            (self._offset + i, base) for i, base in enumerate(self._override)
+            if bases[self._offset + i] != base)))
 
     def __str__(self):
         """
         :return: A human-readable summary of the edit opperation
         """
-        old = self._original_sequence.bases[self._edit_begin:self._edit_end]
-        new = self._new_sequence.bases[self._edit_begin:self._edit_end]
+        old = self.get_old_bases()
+        new = self.get_new_bases()
         edit_str = old + ' -> '
         for i in range(len(old)):
             edit_str += new[i] if old[i] == new[i] else new[i].lower()
@@ -53,12 +68,80 @@ class SequenceReplacementEdit(object):
                 self.get_number_of_bases_modified(),
                 round(self.get_abs_usage_shift(), 2))
 
+    def get_edit_range(self):
+        """
+        :return: tuple of the (begin, end) base positions of the codons
+            touched by the edit
+        """
+        return self._edit_begin, self._edit_end
+
+    def get_old_bases(self):
+        """
+        :return: the original bases of the codons touched by the edit
+        """
+        return self._original_sequence.bases[self._edit_begin:self._edit_end]
+
+    def get_new_bases(self, begin=None, end=None):
+        """
+        :param begin: the first base position (defaults to the edit range)
+        :param end: the position after the last base (defaults to the edit
+            range)
+        :return: the edited bases in the range, without building the edited
+            sequence (by default, those of the codons touched by the edit)
+        """
+        return self._get_new_bases(
+            self._edit_begin if begin is None else begin,
+            self._edit_end if end is None else end)
+
+    def _get_new_bases(self, begin, end):
+        """
+        :return: the edited bases in the range [begin, end), without building
+            the edited sequence
+        """
+        bases = self._original_sequence.bases
+        override_begin = max(begin, self._offset)
+        override_end = min(end, self._offset + len(self._override))
+        if override_begin >= override_end:
+            return bases[begin:end]
+        return bases[begin:override_begin] \
+            + self._override[override_begin - self._offset:
+                             override_end - self._offset] \
+            + bases[override_end:end]
+
+    def get_original_sequence(self):
+        """
+        :return: the AlignedSequence the edit applies to
+        """
+        return self._original_sequence
+
+    def get_offset(self):
+        """
+        :return: the zero-based position the override starts from
+        """
+        return self._offset
+
+    def get_override(self):
+        """
+        :return: the string of bases written onto the original sequence
+        """
+        return self._override
+
+    def get_new_sequence(self):
+        """
+        :return: the AlignedSequence produced by the edit
+        """
+        if self._new_sequence is None:
+            self._new_sequence = AlignedSequence(
+                self._get_new_bases(0, len(self._original_sequence)),
+                self._original_sequence.context)
+        return self._new_sequence
+
     def get_number_of_bases_modified(self):
         """
         :return: The number of bases modified by the edit
         """
-        old = self._original_sequence.bases[self._edit_begin:self._edit_end]
-        new = self._new_sequence.bases[self._edit_begin:self._edit_end]
+        old = self.get_old_bases()
+        new = self.get_new_bases()
         return sum(old[i] != new[i] for i in range(len(old)))
 
     def get_number_of_aminos_modified(self):
@@ -66,12 +149,11 @@ class SequenceReplacementEdit(object):
         :return: The number of amino acids modified by the edit
             (Not all base-edits produce amino changes)
         """
-        begin = self._edit_begin // 3
-        end = self._edit_end // 3
-        old = self._original_sequence.codons[begin:end]
-        new = self._new_sequence.codons[begin:end]
-        return sum(not old[i].encodes_same_amino(new[i])
-                   for i in range(len(old)))
+        context = self._original_sequence.context
+        old = self.get_old_bases()
+        new = self.get_new_bases()
+        return sum(not context.encodes_same_amino(old[i:i + 3], new[i:i + 3])
+                   for i in range(0, len(old), 3))
 
     def get_abs_usage_shift(self):
         """
@@ -81,9 +163,11 @@ class SequenceReplacementEdit(object):
         """
         if self.get_number_of_aminos_modified() > 0:
             return float('inf')
+        context = self._original_sequence.context
+        old = self.get_old_bases()
+        new = self.get_new_bases()
         abs_shift = 0
-        for i in range(self._edit_begin, self._edit_end, 3):
-            abs_shift += abs(
-                Codon(self._original_sequence.bases[i:i + 3]).get_usage()
-                - Codon(self._new_sequence.bases[i:i + 3]).get_usage())
+        for i in range(0, len(old), 3):
+            abs_shift += abs(context.get_usage(old[i:i + 3])
+                             - context.get_usage(new[i:i + 3]))
         return abs_shift
@@ -0,0 +1,218 @@
+"""
+A long-running screening service. The configs and compiled patterns are
+loaded once, and each request only pays for its own screening, which is
+spread across a worker pool.
+
+Speaks a minimal HTTP/1.1 over TCP or a Unix socket:
+    GET /health -> {"status": "ok", "enzymes": [names]}
+    POST /screen, with a JSON body of
+        {"sequences": [{"name": str, "bases": str}, ...],
+         "enzymes": [names] (optional, defaults to all),
+         "max_results": int (optional),
+         "max_bases_modified": int (optional)}
+    -> {"results": [{"name": str, "cuts": [rows]}, ...]}, where rows carry
+        the fields of output_writers.FIELDS (except the sequence name)
+"""
+
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+import asyncio
+import batch
+import json
+import output_writers
+
+_STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class _RequestError(Exception):
+    """A client error, reported with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScreeningServer(object):
+    """
+    Screens batches of sequences against a fixed panel of enzymes, using an
+    executor whose workers keep the loaded tables and compiled patterns
+    between requests.
+    """
+
+    def __init__(self, restriction_enzymes, workers=1):
+        """
+        :param restriction_enzymes: list of RestrictionEnzyme that requests
+            may screen for
+        :param workers: the number of worker processes (1 screens in a
+            single thread of this process)
+        """
+        self._enzymes = list(restriction_enzymes)
+        self._enzyme_indices = {enzyme.name: index
+                                for index, enzyme in enumerate(self._enzymes)}
+        self._executor = batch.create_executor(workers, self._enzymes)
+
+    def close(self):
+        """Shuts down the worker pool."""
+        self._executor.shutdown()
+
+    async def start(self, host='127.0.0.1', port=0, unix_path=None):
+        """
+        :param host: the TCP host to listen on
+        :param port: the TCP port to listen on (0 picks a free port)
+        :param unix_path: if given, listen on this Unix socket instead
+        :return: the started asyncio Server
+        """
+        if unix_path:
+            return await asyncio.start_unix_server(self._handle, unix_path)
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def screen(self, request):
+        """
+        Screens every sequence of a request concurrently.
+
+        :param request: dict, as the JSON body of POST /screen
+        :return: dict, as the JSON response of POST /screen
+        :raises _RequestError: if the request is malformed
+        """
+        if not isinstance(request, dict) \
+                or not isinstance(request.get('sequences'), list):
+            raise _RequestError(400, 'expected a list of "sequences"')
+        names = request.get('enzymes')
+        if names is not None and (not isinstance(names, list) or not all(
+                isinstance(name, str) for name in names)):
+            raise _RequestError(400, '"enzymes" must be a list of names')
+        names = names or list(self._enzyme_indices.keys())
+        unknown = [name for name in names if name not in self._enzyme_indices]
+        if unknown:
+            raise _RequestError(400, 'unknown enzymes: {}'.format(
+                ', '.join(str(name) for name in unknown)))
+        indices = [self._enzyme_indices[name] for name in names]
+        enzymes = [self._enzymes[index] for index in indices]
+        max_results = _get_optional_int(request, 'max_results')
+        max_bases_modified = _get_optional_int(request, 'max_bases_modified')
+
+        aligned_sequences = []
+        for item in request['sequences']:
+            try:
+                aligned_sequences.append(Sequence(item['bases']).align())
+            except (AssertionError, AttributeError, KeyError, TypeError):
+                raise _RequestError(400, 'invalid sequence {}'.format(
+                    json.dumps(item)[:100]))
+
+        loop = asyncio.get_running_loop()
+        all_pairs = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, batch.screen_bases,
+                                 aligned.bases, indices, max_results,
+                                 max_bases_modified)
+            for aligned in aligned_sequences])
+
+        results = []
+        for item, aligned, pairs in zip(request['sequences'],
+                                        aligned_sequences, all_pairs):
+            name = str(item.get('name', ''))
+            cuts = {enzyme: [
+                SequenceReplacementEdit(aligned, Sequence(override), offset)
+                for offset, override in enzyme_pairs]
+                for enzyme, enzyme_pairs in zip(enzymes, pairs)}
+            results.append({'name': name, 'cuts': [
+                {field: row[field] for field in output_writers.FIELDS
+                 if field != 'sequence'}
+                for row in output_writers.get_rows(name, enzymes, cuts)]})
+        return {'results': results}
+
+    async def _handle(self, reader, writer):
+        """Serves one request per connection."""
+        try:
+            status, body = await self._respond(reader)
+        except _RequestError as e:
+            status, body = e.status, {'error': str(e)}
+        except Exception as e:
+            # e.g. a failed work unit; the client still gets a response
+            status, body = 500, {'error': '{}: {}'.format(
+                type(e).__name__, e)}
+        payload = json.dumps(body).encode()
+        writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+                     'Content-Length: {}\r\nConnection: close\r\n\r\n'
+                     .format(status, _STATUS_TEXT[status], len(payload))
+                     .encode())
+        writer.write(payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader):
+        """
+        :return: tuple of (HTTP status, JSON-serializable body)
+        :raises _RequestError: if the request can't be served
+        """
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            raise _RequestError(400, 'malformed request line')
+        method, path = request_line[0], request_line[1]
+        content_length = 0
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            key, _, value = line.partition(':')
+            if key.strip().lower() == 'content-length':
+                if not value.strip().isdigit():
+                    raise _RequestError(400, 'invalid Content-Length')
+                content_length = int(value.strip())
+
+        if path == '/health':
+            return 200, {'status': 'ok',
+                         'enzymes': [e.name for e in self._enzymes]}
+        if path != '/screen':
+            raise _RequestError(404, 'no such path: {}'.format(path))
+        if method != 'POST':
+            raise _RequestError(405, 'expected POST')
+        try:
+            request = json.loads(await reader.readexactly(content_length))
+        except asyncio.IncompleteReadError:
+            raise _RequestError(400, 'body shorter than Content-Length')
+        except ValueError:
+            raise _RequestError(400, 'body is not valid JSON')
+        return 200, await self.screen(request)
+
+
+def _get_optional_int(request, key):
+    """
+    :return: the request's value for key as an int, or None if absent
+    :raises _RequestError: if the value isn't an int
+    """
+    value = request.get(key)
+    if value is not None and not isinstance(value, int):
+        raise _RequestError(400, '"{}" must be an int'.format(key))
+    return value
+
+
+def serve(restriction_enzymes, address, workers=1):
+    """
+    Runs a ScreeningServer until interrupted.
+
+    :param restriction_enzymes: list of RestrictionEnzyme
+    :param address: a TCP port, host:port, or the path of a Unix socket
+    :param workers: the number of worker processes
+    """
+    server = ScreeningServer(restriction_enzymes, workers)
+
+    async def run():
+        if address.isdigit():
+            listener = await server.start(port=int(address))
+        elif ':' in address and address.rsplit(':', 1)[1].isdigit():
+            host, port = address.rsplit(':', 1)
+            listener = await server.start(host, int(port))
+        else:
+            listener = await server.start(unix_path=address)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -0,0 +1,165 @@
+import base_utils
+import bisect
+import itertools
+
+
+class SiteIndex(object):
+    """
+    An index of the positions of every k-mer in a sequence, for finding the
+    sequence's existing sites of a pattern without scanning every offset.
+    """
+
+    def __init__(self, sequence, k=4):
+        """
+        :param sequence: a Sequence
+        :param k: the length of the indexed k-mers
+        """
+        self.bases = sequence.bases
+        self.k = k
+        self._positions = {}
+        for i in range(len(self.bases) - k + 1):
+            self._positions.setdefault(self.bases[i:i + k], []).append(i)
+
+    def find(self, masks):
+        """
+        Finds the offsets at which the sequence's bases exactly match a
+        pattern. (Degenerate bases in the sequence never match.)
+
+        :param masks: tuple of base bitmasks (see Sequence.get_masks)
+        :return: sorted list of offsets
+        """
+        if len(masks) < self.k:
+            candidates = range(len(self.bases) - len(masks) + 1)
+        else:
+            # look up the window of the pattern with the fewest k-mers
+            anchor = min(
+                range(len(masks) - self.k + 1),
+                key=lambda j: _count_primitives(masks[j:j + self.k]))
+            candidates = set()
+            for kmer in _get_primitive_strings(masks[anchor:anchor + self.k]):
+                for position in self._positions.get(kmer, []):
+                    candidates.add(position - anchor)
+        return sorted(offset for offset in candidates
+                      if _matches(self.bases, masks, offset))
+
+
+class OccurrenceIndex(object):
+    """
+    The existing sites of a panel of enzymes in one sequence, on either
+    strand, for counting how many sites an edit would leave without
+    rescanning the sequence. (e.g. to find edits creating a unique cutter)
+
+    A site is an offset whose bases exactly match one of the enzyme's
+    primitive sequences, or their reverse complements, and is counted once
+    even if both strands match.
+    """
+
+    def __init__(self, sequence, restriction_enzymes):
+        """
+        :param sequence: a Sequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        """
+        self.bases = sequence.bases
+        site_index = SiteIndex(sequence)
+        # enzyme -> list of distinct pattern masks (one for palindromes)
+        self._patterns = {}
+        # enzyme -> sorted list of site offsets
+        self._offsets = {}
+        for enzyme in restriction_enzymes:
+            patterns = []
+            for cut_seq in (enzyme.sequence,
+                            enzyme.sequence.reverse_complement()):
+                if cut_seq.get_masks() not in patterns:
+                    patterns.append(cut_seq.get_masks())
+            self._patterns[enzyme] = patterns
+            self._offsets[enzyme] = sorted(set(
+                offset for masks in patterns
+                for offset in site_index.find(masks)))
+
+    def get_enzymes(self):
+        """
+        :return: list of the indexed RestrictionEnzyme, in the order given
+        """
+        return list(self._patterns)
+
+    def get_offsets(self, restriction_enzyme):
+        """
+        :param restriction_enzyme: RestrictionEnzyme of the panel
+        :return: sorted list of the offsets of the enzyme's sites
+        """
+        return list(self._offsets[restriction_enzyme])
+
+    def count_sites(self, restriction_enzyme, edit=None):
+        """
+        Counts the enzyme's sites, after an edit if given. Only the sites
+        that could touch the edit are re-checked, so the cost depends on
+        the lengths of the edit and pattern, not of the sequence.
+
+        :param restriction_enzyme: RestrictionEnzyme of the panel
+        :param edit: optional SequenceReplacementEdit of the indexed sequence
+        :return: the number of sites
+        """
+        offsets = self._offsets[restriction_enzyme]
+        if edit is None:
+            return len(offsets)
+        assert edit.get_original_sequence().bases == self.bases, \
+            'edit must apply to the indexed sequence'
+        length = len(restriction_enzyme)
+        begin, end = edit.get_edit_range()
+        # the offsets of sites that could touch the edit
+        first = max(0, begin - length + 1)
+        last = min(end, len(self.bases) - length + 1)
+        if first >= last:
+            return len(offsets)
+        old_count = bisect.bisect_left(offsets, last) \
+            - bisect.bisect_left(offsets, first)
+        new_bases = edit.get_new_bases(first, last + length - 1)
+        new_count = sum(
+            any(_matches(new_bases, masks, offset - first)
+                for masks in self._patterns[restriction_enzyme])
+            for offset in range(first, last))
+        return len(offsets) - old_count + new_count
+
+    def get_site_counts(self, edits, restriction_enzyme):
+        """
+        :param edits: list of SequenceReplacementEdit of the indexed sequence
+        :param restriction_enzyme: RestrictionEnzyme of the panel
+        :return: list of the number of the enzyme's sites after each edit,
+            indexed like edits
+        """
+        return [self.count_sites(restriction_enzyme, edit) for edit in edits]
+
+    def get_single_cutters(self, edits, restriction_enzyme):
+        """
+        :param edits: list of SequenceReplacementEdit of the indexed sequence
+        :param restriction_enzyme: RestrictionEnzyme of the panel
+        :return: the edits (in order) leaving exactly one site of the enzyme
+        """
+        return [edit for edit, count in zip(
+                edits, self.get_site_counts(edits, restriction_enzyme))
+                if count == 1]
+
+
+def _matches(bases, masks, offset):
+    """Whether the bases at the offset exactly match the pattern."""
+    if offset < 0 or offset + len(masks) > len(bases):
+        return False
+    for base, mask in zip(bases[offset:offset + len(masks)], masks):
+        if not base_utils.PRIMITIVE_MASKS.get(base, 0) & mask:
+            return False
+    return True
+
+
+def _count_primitives(masks):
+    """:return: the number of primitive strings matching the masks"""
+    count = 1
+    for mask in masks:
+        count *= bin(mask).count('1')
+    return count
+
+
+def _get_primitive_strings(masks):
+    """:return: generator of the primitive strings matching the masks"""
+    options = [[base for base, bit in base_utils.PRIMITIVE_MASKS.items()
+                if bit & mask] for mask in masks]
+    return (''.join(bases) for bases in itertools.product(*options))
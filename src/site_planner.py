@@ -0,0 +1,179 @@
+"""
+Planning of several wobble cut-sites in one sequence, choosing the
+combination of edits with the least total codon-usage shift.
+"""
+
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+from wobble_cut_detector import WobbleCutDetector
+import edit_scoring
+import site_index
+
+
+def plan_sites(aligned_sequence, restriction_enzymes, detector=None,
+               max_bases_modified=None):
+    """
+    Chooses one cut-enabling edit per enzyme, such that no two edits touch
+    the same codon and, with every chosen edit applied, each enzyme cuts the
+    sequence exactly once, minimizing the total abs usage shift (then the
+    total bases modified).
+
+    Solved as a dynamic program over codon positions, with the set of
+    enzymes placed so far as state: linear in the sequence length, but
+    exponential in the number of enzymes, which should be kept small.
+    Candidates that would leave another site of their enzyme, or add a site
+    of another enzyme, are dropped up front. Edits can still add sites
+    together (on the bases between them), so the chosen combination is
+    checked, and an offending edit is dropped before planning again: this
+    may miss a valid combination using that edit, but never returns an
+    invalid one.
+
+    :param aligned_sequence: AlignedSequence
+    :param restriction_enzymes: list of RestrictionEnzyme to introduce
+    :param detector: WobbleCutDetector to reuse compiled patterns from
+    :param max_bases_modified: optional limit on the bases per edit
+    :return: dict of RestrictionEnzyme -> SequenceReplacementEdit of the
+        original sequence, one per enzyme (see combine_edits to apply them
+        at once), or None if no compatible combination exists
+    """
+    detector = detector or WobbleCutDetector()
+    cuts = detector.detect_cuts_multi(aligned_sequence, restriction_enzymes,
+                                      max_bases_modified=max_bases_modified)
+    occurrences = site_index.OccurrenceIndex(aligned_sequence,
+                                             restriction_enzymes)
+    candidates = {enzyme: [edit for edit in cuts[enzyme]
+                           if _keeps_unique_sites(occurrences,
+                                                  [enzyme], edit)]
+                  for enzyme in restriction_enzymes}
+    while True:
+        plan = _choose_edits(aligned_sequence, restriction_enzymes,
+                             candidates)
+        if plan is None:
+            return None
+        conflict = _find_conflict(aligned_sequence, occurrences, plan)
+        if conflict is None:
+            return plan
+        enzyme, edit = conflict
+        candidates[enzyme] = [candidate for candidate in candidates[enzyme]
+                              if candidate is not edit]
+
+
+def _choose_edits(aligned_sequence, restriction_enzymes, candidates):
+    """
+    :param candidates: dict of RestrictionEnzyme -> list of
+        SequenceReplacementEdit to choose from
+    :return: the cheapest dict of RestrictionEnzyme -> SequenceReplacementEdit
+        with no shared codons (see plan_sites), or None
+    """
+    codon_count = len(aligned_sequence) // 3
+
+    # codon index -> dict of (end codon index, enzyme bit) -> (cost, enzyme,
+    # edit), keeping only the cheapest edit per enzyme and codon range
+    starting_at = [{} for _ in range(codon_count)]
+    for bit, enzyme in enumerate(restriction_enzymes):
+        edits = candidates[enzyme]
+        bases_modified, usage_shifts = edit_scoring.score_edits(edits)
+        for i, edit in enumerate(edits):
+            begin, end = edit.get_edit_range()
+            cost = (usage_shifts[i], bases_modified[i])
+            key = (end // 3, 1 << bit)
+            best = starting_at[begin // 3].get(key)
+            if best is None or cost < best[0]:
+                starting_at[begin // 3][key] = (cost, enzyme, edit)
+
+    # best[codon index][placed enzyme bits] = (cost, back pointer), where the
+    # back pointer is (previous codon index, previous bits, (enzyme, edit)
+    # or None)
+    best = [{} for _ in range(codon_count + 1)]
+    best[0][0] = ((0, 0), None)
+    for index in range(codon_count):
+        for placed, (cost, _) in list(best[index].items()):
+            _relax(best[index + 1], placed, cost, (index, placed, None))
+            for (end, bit), (edit_cost, enzyme, edit) in \
+                    starting_at[index].items():
+                if placed & bit:
+                    continue
+                _relax(best[end], placed | bit,
+                       (cost[0] + edit_cost[0], cost[1] + edit_cost[1]),
+                       (index, placed, (enzyme, edit)))
+
+    all_placed = (1 << len(restriction_enzymes)) - 1
+    if all_placed not in best[codon_count]:
+        return None
+    chosen = {}
+    index, placed = codon_count, all_placed
+    while index > 0:
+        index, placed, step = best[index][placed][1]
+        if step is not None:
+            chosen[step[0]] = step[1]
+    return {enzyme: chosen[enzyme] for enzyme in restriction_enzymes}
+
+
+def _find_conflict(aligned_sequence, occurrences, plan):
+    """
+    :param occurrences: OccurrenceIndex of the sequence and planned enzymes
+    :param plan: dict of RestrictionEnzyme -> SequenceReplacementEdit
+    :return: (enzyme, edit) of a planned edit to drop, as the combined edit
+        doesn't leave each enzyme cutting once, or None if it does
+    """
+    if not plan or _keeps_unique_sites(
+            occurrences, list(plan),
+            combine_edits(aligned_sequence, list(plan.values()))):
+        return None
+    enzymes = list(plan)
+    for j, enzyme in enumerate(enzymes):
+        for other in enzymes[:j]:
+            if not _keeps_unique_sites(
+                    occurrences, [other, enzyme], combine_edits(
+                        aligned_sequence, [plan[other], plan[enzyme]])):
+                return enzyme, plan[enzyme]
+    return enzymes[-1], plan[enzymes[-1]]
+
+
+def _keeps_unique_sites(occurrences, placed, edit):
+    """
+    :param occurrences: OccurrenceIndex of the sequence and planned enzymes
+    :param placed: list of RestrictionEnzyme the edit should place
+    :param edit: SequenceReplacementEdit of the indexed sequence
+    :return: whether, after the edit, each placed enzyme has exactly one site
+        and no other enzyme has gained a site
+    """
+    for enzyme in occurrences.get_enzymes():
+        count = occurrences.count_sites(enzyme, edit)
+        if enzyme in placed:
+            if count != 1:
+                return False
+        elif count > occurrences.count_sites(enzyme):
+            return False
+    return True
+
+
+def _relax(states, placed, cost, back_pointer):
+    """Records a path to a DP state if it's the cheapest found so far."""
+    if placed not in states or cost < states[placed][0]:
+        states[placed] = (cost, back_pointer)
+
+
+def combine_edits(aligned_sequence, edits):
+    """
+    Merges several edits of a sequence into a single edit.
+
+    :param aligned_sequence: the AlignedSequence all edits apply to
+    :param edits: non-empty list of SequenceReplacementEdit
+    :return: SequenceReplacementEdit applying every edit
+    :raises ValueError: if two edits write different bases to one position
+    """
+    begin = min(edit.get_offset() for edit in edits)
+    end = max(edit.get_offset() + len(edit.get_override()) for edit in edits)
+    bases = list(aligned_sequence.bases[begin:end])
+    written = [False] * len(bases)
+    for edit in edits:
+        for i, base in enumerate(edit.get_override()):
+            position = edit.get_offset() - begin + i
+            if written[position] and bases[position] != base:
+                raise ValueError('conflicting edits at base {}'.format(
+                    begin + position + 1))
+            bases[position] = base
+            written[position] = True
+    return SequenceReplacementEdit(aligned_sequence, Sequence(''.join(bases)),
+                                   begin)
@@ -0,0 +1,66 @@
+from amino_index import AminoIndex
+from codon_lattice import CodonLattice
+from sequence import AlignedSequence
+from sequence import Sequence
+import codons
+import random
+import unittest
+
+
+def get_index(patterns):
+    return AminoIndex(((pattern, Sequence(pattern).get_masks())
+                       for pattern in patterns),
+                      codons.get_loaded_context())
+
+
+class TestAminoIndex(unittest.TestCase):
+    def test_find_covers_every_match(self):
+        patterns = ['GGATCC', 'GCNGC', 'CCGC', 'GATATC', 'AT', 'NNNNNNNNN']
+        index = get_index(patterns)
+        rng = random.Random(1)
+        for _ in range(5):
+            lattice = CodonLattice(AlignedSequence(
+                ''.join(rng.choice('ACGT') for _ in range(90))))
+            candidates = dict(index.find(lattice))
+            for pattern in patterns:
+                masks = Sequence(pattern).get_masks()
+                for offset in range(len(lattice)):
+                    if lattice.get_codon_fills(masks, offset):
+                        self.assertIn(pattern, candidates[offset])
+
+    def test_find_skips_impossible_offsets(self):
+        # AAA AAA (K K) can't hold GGG anywhere
+        lattice = CodonLattice(AlignedSequence('AAAAAA'))
+        self.assertEqual(get_index(['GGG']).find(lattice), [])
+
+    def test_find_range(self):
+        lattice = CodonLattice(AlignedSequence('GGAGGAGGA'))
+        self.assertEqual([offset for offset, _
+                          in get_index(['GG']).find(lattice, 2, 5)],
+                         [2, 3, 4])
+
+    def test_find_near_unknown_codons(self):
+        # TC_ has no amino, but still matches itself exactly
+        lattice = CodonLattice(AlignedSequence('AAATC_'))
+        self.assertIn((3, ['TC']), get_index(['TC']).find(lattice))
+
+    def test_find_protein_sites(self):
+        index = get_index(['GGG', 'ATGTGG'])
+        self.assertEqual(
+            index.find_protein_sites(index.get_protein_ids('GG')),
+            [(0, ['GGG']), (1, ['GGG']), (2, ['GGG']), (3, ['GGG'])])
+        self.assertEqual(
+            index.find_protein_sites(index.get_protein_ids('MW')),
+            [(0, ['ATGTGG'])])
+
+    def test_get_protein_ids(self):
+        index = get_index(['GGG'])
+        self.assertEqual(index.get_protein_ids('KK') + [0],
+                         index.get_protein_ids(['K', 'K']) + [0])
+        self.assertEqual(len(index.get_protein_ids(['M', 'Opal'])), 2)
+        with self.assertRaises(ValueError):
+            index.get_protein_ids('KX')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,6 +15,35 @@ class TestBaseUtils(unittest.TestCase):
         self.assertEqual(base_utils.get_primitives('B'), ['C', 'G', 'T'])
         self.assertEqual(base_utils.get_primitives('N'), ['A', 'C', 'G', 'T'])
 
+    def test_get_mask(self):
+        self.assertEqual(base_utils.get_mask('A'), 1)
+        self.assertEqual(base_utils.get_mask('t'), 8)
+        self.assertEqual(base_utils.get_mask('U'), 8)
+        self.assertEqual(base_utils.get_mask('_'), 16)
+        self.assertEqual(base_utils.get_mask('R'), 5)
+        self.assertEqual(base_utils.get_mask('N'), 15)
+        self.assertEqual(base_utils.BASE_MASKS['B'], 14)
+
+    def test_complement(self):
+        self.assertEqual(base_utils.complement('ACGTU_'), 'TGCAA_')
+        self.assertEqual(base_utils.complement('BDHKMNRSVWY'), 'VHDMKNYSBWR')
+        self.assertEqual(base_utils.complement(b'ACGTU_'), b'TGCAA_')
+
+    def test_reverse_complement(self):
+        self.assertEqual(base_utils.reverse_complement('CAT'), 'ATG')
+        self.assertEqual(base_utils.reverse_complement(b'CAT'), b'ATG')
+        self.assertEqual(base_utils.reverse_complement(''), '')
+
+    def test_get_unrecognized(self):
+        self.assertEqual(base_utils.get_unrecognized('ACGTUN_'), '')
+        self.assertEqual(base_utils.get_unrecognized('AxC-'), 'x-')
+        self.assertEqual(base_utils.get_unrecognized(b'AC\nGT'), b'\n')
+
+    def test_is_primitive(self):
+        self.assertTrue(base_utils.is_primitive('ACGTU_'))
+        self.assertFalse(base_utils.is_primitive('ACN'))
+        self.assertFalse(base_utils.is_primitive(b'R'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,93 @@
+from fasta import FastaRecord
+from restriction_enzymes import RestrictionEnzyme
+from result_cache import ResultCache
+from sequence import AlignedSequence
+from sequence import Sequence
+from wobble_cut_detector import WobbleCutDetector
+import batch
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+
+def get_records():
+    return [FastaRecord('a', Sequence('ATGGCTAGCGGATCC')),
+            FastaRecord('b', Sequence('AAAGGGTTT')),
+            FastaRecord('c', Sequence('ACTG'))]
+
+
+def get_enzymes():
+    return [RestrictionEnzyme('x', 'GGG'), RestrictionEnzyme('y', 'GGATCC'),
+            RestrictionEnzyme('z', 'GCNGC')]
+
+
+def summarize(results):
+    return [(record.name, str(aligned),
+             [sorted(str(edit) for edit in cuts[enzyme]) for enzyme in cuts])
+            for record, aligned, cuts in results]
+
+
+class TestBatch(unittest.TestCase):
+    def test_screen_records_in_process(self):
+        results = list(batch.screen_records(get_records(), get_enzymes()))
+        self.assertEqual([r[0].name for r in results], ['a', 'b', 'c'])
+        record, aligned, cuts = results[1]
+        self.assertEqual(aligned, Sequence('AAAGGGTTT').align())
+        self.assertEqual([len(edits) for edits in cuts.values()], [2, 0, 0])
+
+    def test_screen_records_parallel_matches_in_process(self):
+        enzymes = get_enzymes()
+        expected = summarize(batch.screen_records(get_records(), enzymes))
+        actual = summarize(
+            batch.screen_records(get_records(), enzymes, workers=2))
+        self.assertEqual(actual, expected)
+
+    def test_screen_records_with_cache(self):
+        enzymes = get_enzymes()
+        expected = summarize(batch.screen_records(get_records(), enzymes))
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(os.path.join(directory, 'cache.db'))
+            for _ in range(2):
+                actual = summarize(batch.screen_records(
+                    get_records(), enzymes, cache=cache))
+                self.assertEqual(actual, expected)
+            self.assertEqual(len(cache), len(get_records()) * len(enzymes))
+            cache.close()
+
+    def test_get_chunk_bounds(self):
+        self.assertEqual(list(batch.get_chunk_bounds(30, 10, 4)),
+                         [(0, 18, 12), (12, 30, 24), (24, 30, 30)])
+        self.assertEqual(list(batch.get_chunk_bounds(0, 9, 5)), [])
+
+    def test_screen_chunked_matches_whole_sequence(self):
+        aligned = AlignedSequence('ATGGCTAGCGGATCCAAAGGGTTT' * 20)
+        enzymes = get_enzymes()
+        detector = WobbleCutDetector()
+        for limits in [(None, None), (None, 2), (5, None)]:
+            expected = detector.detect_cuts_multi(aligned, enzymes, *limits)
+            for workers in [1, 2]:
+                actual = batch.screen_chunked(aligned, enzymes, 30, workers,
+                                              *limits)
+                self.assertEqual(actual, expected)
+
+    def test_screen_records_chunked(self):
+        enzymes = get_enzymes()
+        expected = summarize(batch.screen_records(get_records(), enzymes))
+        actual = summarize(batch.screen_records(get_records(), enzymes,
+                                                chunk_size=6))
+        self.assertEqual(actual, expected)
+
+    def test_screen_records_chunked_parallel_uses_one_pool(self):
+        enzymes = get_enzymes()
+        expected = summarize(batch.screen_records(get_records(), enzymes))
+        with unittest.mock.patch('batch.create_executor',
+                                 wraps=batch.create_executor) as create:
+            actual = summarize(batch.screen_records(
+                get_records(), enzymes, workers=2, chunk_size=6))
+        self.assertEqual(actual, expected)
+        self.assertEqual(create.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import benchmark
+import unittest
+import unittest.mock
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_random_orf(self):
+        orf = benchmark.random_orf(300, seed=1)
+        self.assertEqual(len(orf), 300)
+        self.assertEqual(orf.bases, benchmark.random_orf(300, seed=1).bases)
+        self.assertNotEqual(orf.bases, benchmark.random_orf(300, seed=2).bases)
+        aminos = [codon.get_amino() for codon in orf.codons]
+        self.assertEqual(aminos[0], 'M')
+        self.assertIn(aminos[-1], benchmark._STOP_AMINOS)
+        self.assertFalse(benchmark._STOP_AMINOS.intersection(aminos[:-1]))
+
+    def test_random_panel(self):
+        panel = benchmark.random_panel(40, seed=1)
+        self.assertEqual(len(panel), 40)
+        self.assertEqual(panel[0].name, 'AciI')
+        self.assertEqual([e.sequence for e in panel],
+                         [e.sequence for e in benchmark.random_panel(40, 1)])
+
+    def test_run_benchmarks(self):
+        results = benchmark.run_benchmarks([30], 3, memory=False)
+        self.assertIn('detect_cuts/30/3', results)
+        self.assertEqual(results['detect_cuts/30/3']['bases'], 30)
+
+    def test_measure_warms_up_and_keeps_fastest(self):
+        calls = []
+        # the warm-up run isn't timed, then runs take 0.3, 0.1 and 0.2 s
+        clock = iter([0.0, 0.3, 1.0, 1.1, 2.0, 2.2])
+        with unittest.mock.patch('time.perf_counter', lambda: next(clock)):
+            seconds, peak = benchmark._measure(lambda: calls.append(1),
+                                               False, repeats=3)
+        self.assertEqual(len(calls), 4)
+        self.assertAlmostEqual(seconds, 0.1)
+        self.assertIsNone(peak)
+
+    def test_compare(self):
+        baseline = {'x': {'bases_per_second': 100.0},
+                    'y': {'bases_per_second': 100.0}}
+        results = {'x': {'bases_per_second': 90.0},
+                   'y': {'bases_per_second': 70.0},
+                   'z': {'bases_per_second': 1.0}}
+        self.assertEqual(benchmark.compare(results, baseline, 0.2),
+                         ['y: 70 bases/s (baseline 100)'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+from codon_lattice import CodonLattice
+from sequence import AlignedSequence
+from sequence import Sequence
+import unittest
+
+
+class TestCodonLattice(unittest.TestCase):
+    def test_len(self):
+        self.assertEqual(len(CodonLattice(AlignedSequence('AAACCC'))), 6)
+
+    def test_get_fills_synonymous_codon(self):
+        lattice = CodonLattice(AlignedSequence('AAATTT'))
+        self.assertEqual(lattice.get_fills(0, 2, Sequence('N').get_masks()),
+                         ('A', 'G'))
+        self.assertEqual(lattice.get_fills(1, 0, Sequence('TTN').get_masks()),
+                         ('TTC', 'TTT'))
+        self.assertEqual(lattice.get_fills(0, 0, Sequence('AAC').get_masks()),
+                         ())
+
+    def test_get_fills_not_synonymous(self):
+        lattice = CodonLattice(AlignedSequence('AAATTT'), synonymous=False)
+        self.assertEqual(lattice.get_fills(0, 2, Sequence('N').get_masks()),
+                         ('A',))
+        self.assertEqual(lattice.get_fills(1, 0, Sequence('TTC').get_masks()),
+                         ())
+
+    def test_get_fills_unknown_codons_must_match_exactly(self):
+        lattice = CodonLattice(AlignedSequence('TC_'))
+        self.assertEqual(lattice.get_fills(0, 0, Sequence('TC').get_masks()),
+                         ('TC',))
+        self.assertEqual(lattice.get_fills(0, 0, Sequence('TCA').get_masks()),
+                         ())
+
+    def test_get_codon_fills_across_codons(self):
+        # AGC GGC -> AGG GGC changes S to R, AGC GGG keeps S G
+        lattice = CodonLattice(AlignedSequence('AGCGGCTTT'))
+        ggg = Sequence('GGG').get_masks()
+        self.assertEqual(lattice.get_codon_fills(ggg, 3), [('GGG',)])
+        self.assertIsNone(lattice.get_codon_fills(ggg, 2))
+        self.assertEqual(
+            lattice.get_codon_fills(Sequence('YGG').get_masks(), 2),
+            [('C', 'T'), ('GG',)])
+
+    def test_get_codon_fills_past_end(self):
+        lattice = CodonLattice(AlignedSequence('AAA'))
+        self.assertIsNone(
+            lattice.get_codon_fills(Sequence('AA').get_masks(), 2))
+
+    def test_update(self):
+        lattice = CodonLattice(AlignedSequence('AAATTT'))
+        lattice.update('AAATGG', 3, 6)
+        self.assertEqual(lattice.bases, 'AAATGG')
+        self.assertEqual(lattice.get_fills(1, 0, Sequence('TNN').get_masks()),
+                         ('TGG',))
+
+    def test_get_fill_cost(self):
+        lattice = CodonLattice(AlignedSequence('AATAAC'))
+        self.assertEqual(lattice.get_fill_cost(0, 2, 'T'), (0, 0))
+        bases_modified, usage_shift = lattice.get_fill_cost(0, 1, 'AC')
+        self.assertEqual(bases_modified, 1)
+        self.assertAlmostEqual(usage_shift, 0.29)
+
+
+if __name__ == '__main__':
+    unittest.main()
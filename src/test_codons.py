@@ -1,10 +1,19 @@
 from codons import Codon
+from sequence import Sequence
+import base_utils
 import codons
 import itertools
 import os
 import unittest
 
 
+def get_mitochondrial_context():
+    encodings, _, usage_table = codons.get_state()
+    encodings = dict(encodings)
+    encodings['TGA'] = 'W'
+    return codons.CodonContext(encodings, usage_table, 'mito')
+
+
 def get_usage_options():
     options = set()
     for item in os.listdir('../configs/usage_tables'):
@@ -41,6 +50,88 @@ class TestConfigs(unittest.TestCase):
         codons.load_usage()
 
 
+class TestCodonTables(unittest.TestCase):
+    def test_tables_cover_all_iupac_codons(self):
+        self.assertEqual(len(codons._CODONS), len(base_utils.ALL_BASES) ** 3)
+        for bases in codons._CODONS:
+            self.assertIn(bases, codons.get_synonyms(bases))
+
+    def test_codon_codes(self):
+        code = codons.get_codon_code('ACT')
+        self.assertEqual(codons.get_codon_bases(code), 'ACT')
+        self.assertNotEqual(codons.get_codon_code('ACN'), code)
+        self.assertEqual(
+            list(codons.get_codon_codes('ACTACN')),
+            [code, codons.get_codon_code('ACN')])
+
+    def test_get_amino(self):
+        self.assertEqual(codons.get_amino('AAA'), 'K')
+        self.assertEqual(codons.get_amino('MGR'), 'R')
+        self.assertEqual(codons.get_amino('UGG'), 'W')
+        self.assertEqual(codons.get_amino('NNN'), codons._UNKNOWN_AMINO)
+
+    def test_encodes_same_amino(self):
+        self.assertTrue(codons.encodes_same_amino('AAA', 'AAR'))
+        self.assertFalse(codons.encodes_same_amino('AAA', 'AAC'))
+        self.assertTrue(codons.encodes_same_amino('TC_', 'TC_'))
+        self.assertFalse(codons.encodes_same_amino('TC_', 'TCA'))
+
+    def test_get_state_round_trip(self):
+        state = codons.get_state()
+        codons.set_state(state)
+        self.assertEqual(codons.get_state(), state)
+        self.assertEqual(codons.get_amino('AAA'), 'K')
+
+    def test_get_usage(self):
+        self.assertEqual(codons.get_usage('ACT'), 1.42)
+        self.assertEqual(codons.get_usage('ACN'), 0)
+
+
+class TestCodonContext(unittest.TestCase):
+    def test_load_context(self):
+        human = codons.load_context()
+        mouse = codons.load_context(usage_file_name='mouse')
+        self.assertEqual(human.get_usage('ACT'), 1.42)
+        self.assertEqual(mouse.get_usage('ACT'), 1.30)
+        self.assertEqual(mouse.usage_source, 'mouse')
+        self.assertTrue(human.has_same_encodings(mouse))
+        # the loaded tables are unaffected
+        self.assertEqual(codons.get_usage('ACT'), 1.42)
+
+    def test_lookups(self):
+        context = get_mitochondrial_context()
+        self.assertEqual(context.get_amino('TGA'), 'W')
+        self.assertEqual(context.get_amino('TGR'), 'W')
+        self.assertEqual(codons.get_amino('TGR'), codons._UNKNOWN_AMINO)
+        self.assertTrue(context.encodes_same_amino('TGA', 'TGG'))
+        self.assertIn('TGA', context.get_synonyms('TGG'))
+        self.assertEqual(context.get_code_tables()[1],
+                         codons.get_code_tables()[1])
+        self.assertFalse(
+            context.has_same_encodings(codons.get_loaded_context()))
+
+    def test_translating_doesnt_load_usage(self):
+        state = codons.get_state()
+        try:
+            codons._usage_table = None
+            codons._usage_source = None
+            codons._loaded_context = None
+            Sequence('ATGAAA').align().get_amino_string()
+            codon = Codon('AAA')
+            codons.load_usage('mouse')
+            self.assertEqual(codons.get_usage('ACT'), 1.30)
+            self.assertEqual(codon.get_usage(), codons.get_usage('AAA'))
+            self.assertEqual(codons.get_loaded_context().usage_source,
+                             'mouse')
+        finally:
+            codons.set_state(state)
+
+    def test_get_loaded_context(self):
+        context = codons.get_loaded_context()
+        self.assertIs(codons.get_loaded_context(), context)
+        self.assertEqual(context.get_state(), codons.get_state())
+
+
 class TestCodon(unittest.TestCase):
     def test_init_enforces_length(self):
         self.assertRaises(AssertionError, lambda: Codon(''))
@@ -52,6 +143,18 @@ class TestCodon(unittest.TestCase):
     def test_init_is_case_insensitive(self):
         self.assertEqual(Codon('AGT'), Codon('agt'))
 
+    def test_interned(self):
+        self.assertIs(Codon('AGT'), Codon('agt'))
+        self.assertIsNot(Codon('AGT'), Codon('AGT', get_mitochondrial_context()))
+        self.assertEqual(len({Codon('AGT'), Codon('agt'), Codon('AGC')}), 2)
+        with self.assertRaises(AttributeError):
+            Codon('AGT').bases = 'AGC'
+
+    def test_context(self):
+        context = get_mitochondrial_context()
+        self.assertEqual(Codon('TGA', context).get_amino(), 'W')
+        self.assertNotEqual(Codon('TGA').get_amino(), 'W')
+
     def test_init_validates_bases(self):
         # These are all valid
         Codon('ACT')
@@ -108,6 +211,14 @@ class TestCodon(unittest.TestCase):
         # Note that '_' is *not* a wildcard. (TCN all map to the same amino)
         self.assertFalse(Codon('TC_').encodes_same_amino(Codon('TCA')))
 
+    def test_get_synonyms(self):
+        self.assertEqual(codons.get_synonyms('TGG'),
+                         frozenset(['TGG', 'UGG']))
+        self.assertIn('AAG', codons.get_synonyms('AAA'))
+        self.assertIn('AAR', codons.get_synonyms('AAA'))
+        self.assertNotIn('AAC', codons.get_synonyms('AAA'))
+        self.assertEqual(codons.get_synonyms('TC_'), frozenset(['TC_']))
+
     def test_get_usage(self):
         self.assertEqual(Codon('ACT').get_usage(), 1.42)
         self.assertEqual(Codon('NBH').get_usage(), 0)
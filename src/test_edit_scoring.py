@@ -0,0 +1,41 @@
+from sequence import AlignedSequence
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+import edit_scoring
+import unittest
+
+
+def get_edits():
+    aligned = AlignedSequence('AATAACCCCTC_')
+    return [SequenceReplacementEdit(aligned, Sequence('AA'), 4),
+            SequenceReplacementEdit(aligned, Sequence('C'), 2),
+            SequenceReplacementEdit(aligned, Sequence('CAATCCA'), 2),
+            SequenceReplacementEdit(aligned, Sequence('TC_'), 9),
+            SequenceReplacementEdit(aligned, Sequence('A'), 11),
+            SequenceReplacementEdit(aligned, Sequence('AAT'), 0)]
+
+
+class TestEditScoring(unittest.TestCase):
+    def test_score_edits_matches_edit_methods(self):
+        edits = get_edits()
+        bases_modified, usage_shifts = edit_scoring.score_edits(edits)
+        self.assertEqual(list(bases_modified),
+                         [e.get_number_of_bases_modified() for e in edits])
+        self.assertEqual(list(usage_shifts),
+                         [e.get_abs_usage_shift() for e in edits])
+
+    def test_score_edits_empty(self):
+        bases_modified, usage_shifts = edit_scoring.score_edits([])
+        self.assertEqual(len(bases_modified), 0)
+        self.assertEqual(len(usage_shifts), 0)
+
+    def test_rank_edits(self):
+        edits = get_edits()
+        expected = sorted(edits, key=lambda e: (
+            e.get_number_of_bases_modified(), e.get_abs_usage_shift()))
+        self.assertEqual([str(e) for e in edit_scoring.rank_edits(edits)],
+                         [str(e) for e in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
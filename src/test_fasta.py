@@ -0,0 +1,95 @@
+from fasta import FastaRecord
+from sequence import AlignedSequence
+from sequence import Sequence
+import fasta
+import gzip
+import os
+import tempfile
+import unittest
+
+_FASTA = '>rec1 first record\nACTG\nGGC\n\n; comment\n>rec2\nAAA\n'
+
+
+class TestFasta(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_parse_records(self):
+        records = list(fasta.parse_records(_FASTA.splitlines()))
+        self.assertEqual(records, [
+            FastaRecord('rec1 first record', Sequence('ACTGGGC')),
+            FastaRecord('rec2', Sequence('AAA'))])
+
+    def test_parse_records_empty(self):
+        self.assertEqual(list(fasta.parse_records([])), [])
+
+    def test_parse_records_requires_header(self):
+        with self.assertRaises(ValueError):
+            list(fasta.parse_records(['ACTG']))
+
+    def test_read_records(self):
+        path = os.path.join(self.dir.name, 'seqs.fa')
+        with open(path, 'w') as outfile:
+            outfile.write(_FASTA)
+        self.assertEqual([r.name for r in fasta.read_records(path)],
+                         ['rec1 first record', 'rec2'])
+
+    def test_read_records_gzip(self):
+        path = os.path.join(self.dir.name, 'seqs.fa.gz')
+        with gzip.open(path, 'wt') as outfile:
+            outfile.write(_FASTA)
+        records = fasta.read_records(path)
+        self.assertEqual(next(records),
+                         FastaRecord('rec1 first record', Sequence('ACTGGGC')))
+
+    def _write(self, name, data):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'wb') as outfile:
+            outfile.write(data)
+        return path
+
+    def test_map_sequence(self):
+        path = self._write('seq.txt', b'actg\r\nGGC\nnR\n')
+        self.assertEqual(fasta.map_sequence(path), Sequence('ACTGGGCNR'))
+
+    def test_map_sequence_skips_headers(self):
+        path = self._write('seq.fa', b'>rec1 first record\nACTG\n>rec2\nAAA')
+        self.assertEqual(fasta.map_sequence(path), Sequence('ACTGAAA'))
+
+    def test_map_sequence_skips_comments(self):
+        path = self._write('seq.fa',
+                           b';comment\n>rec1;x\nAC\n  ;indented\nTG\n;end')
+        self.assertEqual(fasta.map_sequence(path), Sequence('ACTG'))
+        with open(path) as infile:
+            self.assertEqual(
+                [record.sequence for record in fasta.parse_records(infile)],
+                [Sequence('ACTG')])
+
+    def test_map_sequence_keeps_markers_within_lines(self):
+        path = self._write('seq.txt', b'AC;G\n')
+        with self.assertRaises(ValueError):
+            fasta.map_sequence(path)
+
+    def test_map_sequence_aligned(self):
+        path = self._write('seq.fa', b'>rec1\nACTG\n>rec2\nAAA')
+        self.assertEqual(fasta.map_sequence(path, aligned=True),
+                         AlignedSequence('ACTGAAA__'))
+        path = self._write('empty.txt', b'')
+        self.assertEqual(fasta.map_sequence(path, aligned=True),
+                         AlignedSequence(''))
+
+    def test_map_sequence_empty(self):
+        path = self._write('empty.txt', b'')
+        self.assertEqual(fasta.map_sequence(path), Sequence(''))
+
+    def test_map_sequence_unrecognized_base(self):
+        path = self._write('seq.txt', b'ACTG\nAXC\n')
+        with self.assertRaises(ValueError):
+            fasta.map_sequence(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
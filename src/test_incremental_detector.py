@@ -0,0 +1,101 @@
+from incremental_detector import IncrementalCutDetector
+from restriction_enzymes import RestrictionEnzyme
+from sequence import AlignedSequence
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+from wobble_cut_detector import WobbleCutDetector
+import codons
+import random
+import unittest
+import unittest.mock
+
+
+def summarize(cuts):
+    return {enzyme.name: [str(edit) for edit in edits]
+            for enzyme, edits in cuts.items()}
+
+
+def get_enzymes():
+    return [RestrictionEnzyme('x', 'GGG'), RestrictionEnzyme('y', 'GGATCC'),
+            RestrictionEnzyme('z', 'GCNGC'), RestrictionEnzyme('w', 'AT')]
+
+
+class TestIncrementalCutDetector(unittest.TestCase):
+    def test_get_cuts_matches_detector(self):
+        aligned = AlignedSequence('ATGGCTAGCGGATCCAAGCTTTAA')
+        enzymes = get_enzymes()
+        incremental = IncrementalCutDetector(aligned, enzymes)
+        self.assertEqual(
+            summarize(incremental.get_cuts()),
+            summarize(WobbleCutDetector().detect_cuts_multi(aligned, enzymes)))
+
+    def test_apply_matches_full_rescreen(self):
+        rng = random.Random(0)
+        aligned = AlignedSequence(
+            ''.join(rng.choice('ACGT') for _ in range(90)))
+        enzymes = get_enzymes()
+        detector = WobbleCutDetector()
+        incremental = IncrementalCutDetector(aligned, enzymes, detector)
+        for _ in range(10):
+            cuts = [edit for edits in incremental.get_cuts().values()
+                    for edit in edits]
+            incremental.apply(rng.choice(cuts))
+            self.assertEqual(
+                summarize(incremental.get_cuts()),
+                summarize(detector.detect_cuts_multi(
+                    incremental.get_sequence(), enzymes)))
+
+    def test_apply_returns_window_cuts(self):
+        aligned = AlignedSequence('AAATTTAAATTTAAA')
+        enzyme = RestrictionEnzyme('x', 'GGG')
+        incremental = IncrementalCutDetector(aligned, [enzyme])
+        window = incremental.apply(
+            SequenceReplacementEdit(aligned, Sequence('GGG'), 6))
+        self.assertEqual(window[enzyme], [(6, 'GGG')])
+        self.assertEqual(incremental.get_sequence(),
+                         AlignedSequence('AAATTTGGGTTTAAA'))
+
+    def test_apply_work_scales_with_edit(self):
+        rng = random.Random(1)
+        aligned = AlignedSequence(
+            ''.join(rng.choice('ACGT') for _ in range(30000)))
+        enzymes = get_enzymes()
+        detector = WobbleCutDetector()
+        incremental = IncrementalCutDetector(aligned, enzymes, detector)
+        # far apart edits of the original sequence, which stay valid
+        edits = {}
+        for edit in incremental.get_cuts()[enzymes[0]]:
+            edits.setdefault(edit.get_offset() // 3000, edit)
+        edits = list(edits.values())[::2]
+        self.assertGreater(len(edits), 1)
+        get_codon_codes = codons.get_codon_codes
+        with unittest.mock.patch.object(
+                detector, 'detect_overrides',
+                wraps=detector.detect_overrides) as detect_overrides, \
+                unittest.mock.patch('codons.get_codon_codes',
+                                    wraps=get_codon_codes) as encode:
+            for edit in edits:
+                incremental.apply(edit)
+        # no sequence is copied or re-encoded, and only windows are screened
+        self.assertEqual(encode.call_count, 0)
+        for call in detect_overrides.call_args_list:
+            _, _, begin, end = call[0]
+            # (edit ranges of GGG span at most 6 bases, patterns 6)
+            self.assertLessEqual(end - begin, 6 + 6 - 1)
+        self.assertEqual(
+            summarize(incremental.get_cuts()),
+            summarize(detector.detect_cuts_multi(
+                incremental.get_sequence(), enzymes)))
+
+    def test_apply_rejects_stale_edits(self):
+        aligned = AlignedSequence('AAAGGGTTT')
+        incremental = IncrementalCutDetector(aligned, get_enzymes())
+        incremental.apply(
+            SequenceReplacementEdit(aligned, Sequence('GGG'), 2))
+        # the edit's codons have since changed
+        self.assertRaises(AssertionError, lambda: incremental.apply(
+            SequenceReplacementEdit(aligned, Sequence('TTT'), 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+from restriction_enzymes import RestrictionEnzyme
+from sequence import AlignedSequence
+from wobble_cut_detector import WobbleCutDetector
+import io
+import json
+import output_writers
+import unittest
+
+
+def get_cuts():
+    aligned = AlignedSequence('AGCGGCTTT')
+    enzymes = [RestrictionEnzyme('x', 'GGG'), RestrictionEnzyme('y', 'CCC'),
+               RestrictionEnzyme('z', 'GAATTC')]
+    return aligned, enzymes, WobbleCutDetector().detect_cuts_multi(
+        aligned, enzymes)
+
+
+def write(output_format):
+    aligned, enzymes, cuts = get_cuts()
+    stream = io.StringIO()
+    writer = output_writers.get_writer(output_format, stream)
+    writer.write_record('seq1 description', aligned, enzymes, cuts)
+    return stream.getvalue()
+
+
+class TestOutputWriters(unittest.TestCase):
+    def test_jsonl(self):
+        rows = [json.loads(line) for line in write('jsonl').splitlines()]
+        _, enzymes, cuts = get_cuts()
+        usage_shift = round(cuts[enzymes[0]][0].get_abs_usage_shift(), 6)
+        self.assertEqual(rows, [
+            {'sequence': 'seq1 description', 'enzyme': 'x', 'strand': '+',
+             'offset': 3, 'old_bases': 'GGC', 'new_bases': 'GGG',
+             'bases_changed': 1, 'usage_shift': usage_shift},
+            {'sequence': 'seq1 description', 'enzyme': 'y', 'strand': '-',
+             'offset': 3, 'old_bases': 'GGC', 'new_bases': 'GGG',
+             'bases_changed': 1, 'usage_shift': usage_shift}])
+
+    def test_tsv(self):
+        lines = write('tsv').splitlines()
+        self.assertEqual(lines[0].split('\t'), list(output_writers.FIELDS))
+        self.assertEqual(lines[1].split('\t')[:7], [
+            'seq1 description', 'x', '+', '3', 'GGC', 'GGG', '1'])
+        self.assertEqual(len(lines), 3)
+
+    def test_bed(self):
+        self.assertEqual(write('bed').splitlines(), [
+            'seq1\t3\t6\tx\t1\t+', 'seq1\t3\t6\ty\t1\t-'])
+
+    def test_genbank(self):
+        lines = write('genbank').splitlines()
+        self.assertEqual(lines[0].split(), ['LOCUS', 'seq1', '9', 'bp', 'DNA'])
+        self.assertIn('     misc_feature    4..6', lines)
+        self.assertIn('     misc_feature    complement(4..6)', lines)
+        self.assertIn('                     /new_bases="GGG"', lines)
+        self.assertEqual(lines[-1], '//')
+
+    def test_unsupported_format(self):
+        with self.assertRaises(KeyError):
+            output_writers.get_writer('xml', io.StringIO())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+from restriction_enzymes import RestrictionEnzyme
+from result_cache import ResultCache
+from sequence import AlignedSequence
+from wobble_cut_detector import WobbleCutDetector
+import hashlib
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'cache.db')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_get_missing(self):
+        cache = ResultCache(self.path)
+        self.assertIsNone(cache.get(AlignedSequence('AAA'),
+                                    RestrictionEnzyme('x', 'GGG')))
+        cache.close()
+
+    def test_put_get_persists(self):
+        aligned = AlignedSequence('AAAGGGTTT')
+        enzyme = RestrictionEnzyme('x', 'GGG')
+        edits = WobbleCutDetector().detect_cuts(aligned, enzyme)
+        cache = ResultCache(self.path)
+        cache.put(aligned, enzyme, edits)
+        cache.close()
+
+        cache = ResultCache(self.path)
+        self.assertEqual(cache.get(aligned, enzyme), edits)
+        # results are keyed by pattern and options, not enzyme name
+        self.assertEqual(
+            cache.get(aligned, RestrictionEnzyme('y', 'GGG')), edits)
+        self.assertIsNone(cache.get(aligned, enzyme, max_results=1))
+        self.assertIsNone(cache.get(AlignedSequence('AAAGGGTTC'), enzyme))
+        cache.close()
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(self.path, max_entries=2)
+        aligned = AlignedSequence('AAA')
+        enzymes = [RestrictionEnzyme(b, b) for b in ['A', 'C', 'G']]
+        cache.put(aligned, enzymes[0], [])
+        cache.put(aligned, enzymes[1], [])
+        cache.get(aligned, enzymes[0])
+        cache.put(aligned, enzymes[2], [])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(aligned, enzymes[0]))
+        self.assertIsNone(cache.get(aligned, enzymes[1]))
+        cache.close()
+
+    def test_len_counts_replaced_results_once(self):
+        cache = ResultCache(self.path)
+        aligned = AlignedSequence('AAA')
+        cache.put(aligned, RestrictionEnzyme('x', 'GGG'), [])
+        cache.put(aligned, RestrictionEnzyme('y', 'GGG'), [])
+        self.assertEqual(len(cache), 1)
+        cache.close()
+        self.assertEqual(len(ResultCache(self.path)), 1)
+
+    def test_batch_commits_once(self):
+        cache = ResultCache(self.path)
+        aligned = AlignedSequence('AAAGGGTTT')
+        enzymes = [RestrictionEnzyme(b, b) for b in ['A', 'C', 'G']]
+        with cache.batch():
+            for enzyme in enzymes:
+                cache.put(aligned, enzyme, [])
+                cache.get(aligned, enzyme)
+            self.assertTrue(cache._connection.in_transaction)
+        self.assertFalse(cache._connection.in_transaction)
+        cache.close()
+        self.assertEqual(len(ResultCache(self.path)), 3)
+
+    def test_hashes_each_sequence_once(self):
+        cache = ResultCache(self.path)
+        aligned = AlignedSequence('AAAGGGTTT')
+        other = AlignedSequence('AAAGGGTTC')
+        enzymes = [RestrictionEnzyme(b, b) for b in ['A', 'C', 'G']]
+        with unittest.mock.patch('hashlib.sha256',
+                                 wraps=hashlib.sha256) as sha256:
+            for enzyme in enzymes:
+                cache.put(aligned, enzyme, [])
+                cache.get(aligned, enzyme)
+        # once for the tables, once for the sequence, then once per key
+        self.assertEqual(sha256.call_count, 2 + 2 * len(enzymes))
+        for enzyme in enzymes:
+            self.assertIsNone(cache.get(other, enzyme))
+            self.assertEqual(cache.get(AlignedSequence('AAAGGGTTT'), enzyme),
+                             [])
+        cache.close()
+
+    def test_indexes_last_used(self):
+        cache = ResultCache(self.path)
+        plan = cache._connection.execute(
+            'EXPLAIN QUERY PLAN SELECT key FROM results '
+            'ORDER BY last_used LIMIT 1').fetchall()
+        self.assertIn('results_last_used', str(plan))
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
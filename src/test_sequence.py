@@ -1,6 +1,7 @@
 from codons import Codon
 from sequence import AlignedSequence
 from sequence import Sequence
+import codons
 import unittest
 
 
@@ -63,6 +64,10 @@ class TestSequence(unittest.TestCase):
                              [Sequence('AAA'), Sequence('AAC'),
                               Sequence('GAA'), Sequence('GAC')])
 
+    def test_get_masks(self):
+        self.assertEqual(Sequence('ACGT_').get_masks(), (1, 2, 4, 8, 16))
+        self.assertEqual(Sequence('ANT').get_masks(), (1, 15, 8))
+
 
 class TestAlignedSequence(unittest.TestCase):
     def test_init_validates_length(self):
@@ -74,6 +79,13 @@ class TestAlignedSequence(unittest.TestCase):
         expected_codons = [Codon('ACT'), Codon('GGC')]
         self.assertEqual(seq.codons, expected_codons)
 
+    def test_codons_are_created_on_demand(self):
+        seq = AlignedSequence('ACTGGCTT_')
+        self.assertEqual(len(seq.codons), 3)
+        self.assertEqual(seq.codons[1], Codon('GGC'))
+        self.assertEqual(seq.codons[-1], Codon('TT_'))
+        self.assertEqual(seq.codons[1:], [Codon('GGC'), Codon('TT_')])
+
     def test_str(self):
         long_seq = AlignedSequence('A' * 99)
         expected = \
@@ -89,6 +101,18 @@ class TestAlignedSequence(unittest.TestCase):
             AlignedSequence('ACTGGC' * 6 + 'TT_').get_amino_string(),
             'TGTGT : GTGTG : TG?')
 
+    def test_with_context(self):
+        encodings, _, usage_table = codons.get_state()
+        encodings = dict(encodings, TGA='W')
+        context = codons.CodonContext(encodings, usage_table)
+        seq = AlignedSequence('TGATGG')
+        mito = seq.with_context(context)
+        self.assertIs(mito.context, context)
+        self.assertEqual(mito.get_amino_string(), 'WW')
+        self.assertEqual(mito.codons[0].get_amino(), 'W')
+        self.assertEqual(seq.get_amino_string(), 'OpalW')
+        self.assertEqual(mito, seq)
+
     def test_encodes_same_aminos(self):
         seq = AlignedSequence('ACTGGCTT_')
         matching = AlignedSequence('ACGGGATT_')
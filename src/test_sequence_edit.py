@@ -17,6 +17,26 @@ class TestSequenceEdit(unittest.TestCase):
         diff = SequenceReplacementEdit(AlignedSequence('ACT'), Sequence('G'), 2)
         self.assertEqual(edit, same)
         self.assertNotEqual(edit, diff)
+        # different overrides with the same outcome are equal
+        self.assertEqual(
+            SequenceReplacementEdit(AlignedSequence('ACT'), Sequence('CA'), 1),
+            edit)
+
+    def test_hash(self):
+        edits = {
+            SequenceReplacementEdit(AlignedSequence('ACT'), Sequence('A'), 2),
+            SequenceReplacementEdit(AlignedSequence('ACT'), Sequence('CA'), 1),
+            SequenceReplacementEdit(AlignedSequence('ACT'), Sequence('G'), 2)}
+        self.assertEqual(len(edits), 2)
+        self.assertIn(SequenceReplacementEdit(
+            AlignedSequence('ACT'), Sequence('ACA'), 0), edits)
+
+    def test_get_new_sequence(self):
+        aligned_sequence = AlignedSequence('AAACCCGGGTTT')
+        edit = SequenceReplacementEdit(aligned_sequence, Sequence('AA'), 5)
+        self.assertEqual(edit.get_new_sequence(),
+                         AlignedSequence('AAACCAAGGTTT'))
+        self.assertEqual(aligned_sequence, AlignedSequence('AAACCCGGGTTT'))
 
     def test_str(self):
         aligned_sequence = AlignedSequence('AAACCCGGGTTT')
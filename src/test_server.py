@@ -0,0 +1,103 @@
+from restriction_enzymes import RestrictionEnzyme
+from server import ScreeningServer
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+
+def get_enzymes():
+    return [RestrictionEnzyme('x', 'GGG'), RestrictionEnzyme('y', 'GGATCC')]
+
+
+async def request(connection, method, path, body=None):
+    reader, writer = await connection
+    payload = b'' if body is None else body.encode()
+    writer.write('{} {} HTTP/1.1\r\nHost: localhost\r\n'
+                 'Content-Length: {}\r\n\r\n'.format(method, path,
+                                                    len(payload)).encode())
+    writer.write(payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def run(method, path, body=None, unix=False):
+    """Starts a server, sends it one request, and returns the response."""
+    server = ScreeningServer(get_enzymes())
+
+    async def main():
+        with tempfile.TemporaryDirectory() as directory:
+            if unix:
+                path_ = os.path.join(directory, 'server.sock')
+                listener = await server.start(unix_path=path_)
+                connection = asyncio.open_unix_connection(path_)
+            else:
+                listener = await server.start()
+                port = listener.sockets[0].getsockname()[1]
+                connection = asyncio.open_connection('127.0.0.1', port)
+            async with listener:
+                return await request(connection, method, path, body)
+
+    try:
+        return asyncio.run(main())
+    finally:
+        server.close()
+
+
+class TestServer(unittest.TestCase):
+    def test_health(self):
+        self.assertEqual(run('GET', '/health'),
+                         (200, {'status': 'ok', 'enzymes': ['x', 'y']}))
+
+    def test_screen(self):
+        status, body = run('POST', '/screen', json.dumps({'sequences': [
+            {'name': 'a', 'bases': 'AGCGGCTTT'},
+            {'name': 'b', 'bases': 'AAATTT'}]}))
+        self.assertEqual(status, 200)
+        self.assertEqual([result['name'] for result in body['results']],
+                         ['a', 'b'])
+        cuts = body['results'][0]['cuts']
+        self.assertEqual(
+            [(cut['enzyme'], cut['offset'], cut['new_bases']) for cut in cuts],
+            [('x', 3, 'GGG')])
+        self.assertEqual(body['results'][1]['cuts'], [])
+
+    def test_screen_unix_socket(self):
+        status, body = run('POST', '/screen', json.dumps({
+            'sequences': [{'name': 'a', 'bases': 'AGCGGCTTT'}],
+            'enzymes': ['y']}), unix=True)
+        self.assertEqual((status, body),
+                         (200, {'results': [{'name': 'a', 'cuts': []}]}))
+
+    def test_screen_errors(self):
+        self.assertEqual(run('POST', '/screen', 'not json')[0], 400)
+        self.assertEqual(run('POST', '/screen', json.dumps({
+            'sequences': [], 'enzymes': ['q']}))[0], 400)
+        self.assertEqual(run('POST', '/screen', json.dumps({
+            'sequences': [{'bases': 'AXG'}]}))[0], 400)
+        self.assertEqual(run('GET', '/screen')[0], 405)
+        self.assertEqual(run('GET', '/nothing')[0], 404)
+
+    def test_screen_invalid_enzymes(self):
+        for enzymes in [5, 'x', [['x']], [None]]:
+            status, body = run('POST', '/screen', json.dumps({
+                'sequences': [{'bases': 'ATGGAATTC'}], 'enzymes': enzymes}))
+            self.assertEqual(status, 400)
+            self.assertIn('enzymes', body['error'])
+
+    def test_screen_internal_error(self):
+        with unittest.mock.patch('batch.screen_bases',
+                                 side_effect=RuntimeError('worker failed')):
+            status, body = run('POST', '/screen', json.dumps({
+                'sequences': [{'bases': 'ATGGAATTC'}]}))
+        self.assertEqual(status, 500)
+        self.assertEqual(body, {'error': 'RuntimeError: worker failed'})
+
+
+if __name__ == '__main__':
+    unittest.main()
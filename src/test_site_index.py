@@ -0,0 +1,64 @@
+from restriction_enzymes import RestrictionEnzyme
+from sequence import AlignedSequence
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+from site_index import OccurrenceIndex
+from site_index import SiteIndex
+import unittest
+
+
+class TestSiteIndex(unittest.TestCase):
+    def test_find(self):
+        index = SiteIndex(Sequence('GAATTCAAGAATTC'))
+        self.assertEqual(index.find(Sequence('GAATTC').get_masks()), [0, 8])
+        self.assertEqual(index.find(Sequence('GGATCC').get_masks()), [])
+
+    def test_find_degenerate_pattern(self):
+        index = SiteIndex(Sequence('GCAGCTTGCCGCA'))
+        self.assertEqual(index.find(Sequence('GCNGC').get_masks()), [0, 7])
+
+    def test_find_short_pattern(self):
+        index = SiteIndex(Sequence('ATAT'))
+        self.assertEqual(index.find(Sequence('AT').get_masks()), [0, 2])
+
+    def test_find_ignores_degenerate_sequence_bases(self):
+        index = SiteIndex(Sequence('GANTTCGAATTC'))
+        self.assertEqual(index.find(Sequence('GAATTC').get_masks()), [6])
+
+
+class TestOccurrenceIndex(unittest.TestCase):
+    def setUp(self):
+        self.aligned = AlignedSequence('GAATTCAAAGGATCCGGATCC')
+        self.eco_ri = RestrictionEnzyme('EcoRI', 'GAATTC')
+        self.bam_hi = RestrictionEnzyme('BamHI', 'GGATCC')
+        self.index = OccurrenceIndex(self.aligned,
+                                     [self.eco_ri, self.bam_hi])
+
+    def test_get_offsets(self):
+        self.assertEqual(self.index.get_offsets(self.eco_ri), [0])
+        self.assertEqual(self.index.get_offsets(self.bam_hi), [9, 15])
+
+    def test_count_sites_reverse_strand(self):
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGATCA')
+        index = OccurrenceIndex(AlignedSequence('TGATCCAAA'), [enzyme])
+        self.assertEqual(index.count_sites(enzyme), 1)
+
+    def test_count_sites_after_edit(self):
+        created = SequenceReplacementEdit(self.aligned, Sequence('GAATTC'),
+                                          15)
+        removed = SequenceReplacementEdit(self.aligned, Sequence('A'), 12)
+        unchanged = SequenceReplacementEdit(self.aligned, Sequence('G'), 9)
+        self.assertEqual(self.index.count_sites(self.eco_ri, created), 2)
+        self.assertEqual(self.index.count_sites(self.bam_hi, removed), 1)
+        self.assertEqual(self.index.get_site_counts(
+            [created, removed, unchanged], self.bam_hi), [1, 1, 2])
+
+    def test_get_single_cutters(self):
+        created = SequenceReplacementEdit(self.aligned, Sequence('GAATTC'),
+                                          15)
+        removed = SequenceReplacementEdit(self.aligned, Sequence('A'), 12)
+        self.assertEqual(self.index.get_single_cutters(
+            [created, removed], self.eco_ri), [removed])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+from restriction_enzymes import RestrictionEnzyme
+from sequence import AlignedSequence
+from sequence import Sequence
+from sequence_edit import SequenceReplacementEdit
+import site_index
+import site_planner
+import unittest
+
+
+class TestSitePlanner(unittest.TestCase):
+    def test_plan_sites_single(self):
+        aligned = AlignedSequence('AAAGGGTTT')
+        enzyme = RestrictionEnzyme('x', 'GGG')
+        plan = site_planner.plan_sites(aligned, [enzyme])
+        # the existing site needs no usage shift
+        self.assertEqual(plan, {
+            enzyme: SequenceReplacementEdit(aligned, Sequence('GGG'), 3)})
+
+    def test_plan_sites_avoids_shared_codons(self):
+        # both enzymes can only cut at the single GGG codon
+        aligned = AlignedSequence('TGGGGGTGG')
+        enzyme_x = RestrictionEnzyme('x', 'GGGGG')
+        enzyme_y = RestrictionEnzyme('y', 'TGGG')
+        self.assertIsNotNone(site_planner.plan_sites(aligned, [enzyme_x]))
+        self.assertIsNotNone(site_planner.plan_sites(aligned, [enzyme_y]))
+        self.assertIsNone(
+            site_planner.plan_sites(aligned, [enzyme_x, enzyme_y]))
+
+    def test_plan_sites_minimizes_total_usage_shift(self):
+        aligned = AlignedSequence('GGAGGGTCTAAGAGCTCT')
+        enzyme_x = RestrictionEnzyme('x', 'GGG')
+        enzyme_y = RestrictionEnzyme('y', 'AAA')
+        plan = site_planner.plan_sites(aligned, [enzyme_x, enzyme_y])
+        self.assertEqual(set(plan.keys()), {enzyme_x, enzyme_y})
+        ranges = sorted(edit.get_edit_range() for edit in plan.values())
+        self.assertLessEqual(ranges[0][1], ranges[1][0])
+        self.assertEqual(plan[enzyme_x].get_abs_usage_shift(), 0)
+
+    def test_plan_sites_needs_unique_sites(self):
+        # GGG occurs twice already, so no edit makes it a single cutter
+        aligned = AlignedSequence('AAAGGGTTTGGGAAA')
+        self.assertIsNone(site_planner.plan_sites(
+            aligned, [RestrictionEnzyme('x', 'GGG')]))
+
+    def test_plan_sites_checks_combined_edit(self):
+        # the cheapest pair of edits together gives x a second site (TTCT)
+        aligned = AlignedSequence('ACTTGTTCGTCCAGA')
+        enzymes = [RestrictionEnzyme('x', 'AGAA'),
+                   RestrictionEnzyme('y', 'TCGA')]
+        plan = site_planner.plan_sites(aligned, enzymes)
+        self.assertEqual(list(plan.keys()), enzymes)
+        combined = site_planner.combine_edits(aligned, list(plan.values()))
+        occurrences = site_index.OccurrenceIndex(aligned, enzymes)
+        for enzyme in enzymes:
+            self.assertEqual(occurrences.count_sites(enzyme, combined), 1)
+
+    def test_combine_edits(self):
+        aligned = AlignedSequence('AAACCCGGGTTT')
+        combined = site_planner.combine_edits(aligned, [
+            SequenceReplacementEdit(aligned, Sequence('G'), 2),
+            SequenceReplacementEdit(aligned, Sequence('CA'), 10)])
+        self.assertEqual(combined.get_new_sequence(),
+                         AlignedSequence('AAGCCCGGGTCA'))
+
+    def test_combine_edits_conflict(self):
+        aligned = AlignedSequence('AAACCC')
+        self.assertRaises(ValueError, lambda: site_planner.combine_edits(
+            aligned, [SequenceReplacementEdit(aligned, Sequence('GG'), 2),
+                      SequenceReplacementEdit(aligned, Sequence('T'), 3)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 from sequence import AlignedSequence
+from sequence import Sequence
 from sequence_edit import SequenceReplacementEdit
 from restriction_enzymes import RestrictionEnzyme
+from site_index import SiteIndex
 from wobble_cut_detector import WobbleCutDetector
 import codons
+import edit_scoring
 import unittest
+import wobble_cut_detector
 
 
 class TestWobbleCutDetector(unittest.TestCase):
@@ -54,6 +58,171 @@ class TestWobbleCutDetector(unittest.TestCase):
         ])
         self.assertEqual(len(actual_cuts), expected_cut_count)
 
+    def test_detect_cuts_multi(self):
+        aligned = AlignedSequence('AAAGGGTTT')
+        enzyme_x = RestrictionEnzyme('enzyme_x', 'GGG')
+        enzyme_y = RestrictionEnzyme('enzyme_y', 'CCG')
+        enzyme_z = RestrictionEnzyme('enzyme_z', 'AT')
+        detector = WobbleCutDetector()
+        actual_cuts = detector.detect_cuts_multi(
+            aligned, [enzyme_x, enzyme_y, enzyme_z])
+        self.assertEqual(list(actual_cuts.keys()),
+                         [enzyme_x, enzyme_y, enzyme_z])
+        for enzyme in [enzyme_x, enzyme_y, enzyme_z]:
+            self.assertEqual(
+                sorted(str(cut) for cut in actual_cuts[enzyme]),
+                sorted(str(cut)
+                       for cut in detector.detect_cuts(aligned, enzyme)))
+
+    def test_iter_cuts(self):
+        aligned = AlignedSequence('AAATTTAGCGGCTTT' * 300)
+        enzyme_x = RestrictionEnzyme('enzyme_x', 'AT')
+        enzyme_y = RestrictionEnzyme('enzyme_y', 'GGG')
+        detector = WobbleCutDetector()
+        pairs = list(detector.iter_cuts(aligned, [enzyme_x, enzyme_y]))
+        offsets = [edit.get_offset() for _, edit in pairs]
+        self.assertEqual(offsets, sorted(offsets))
+        for enzyme in [enzyme_x, enzyme_y]:
+            self.assertEqual(
+                [edit for e, edit in pairs if e is enzyme],
+                detector.detect_cuts(aligned, enzyme))
+
+    def test_iter_cuts_stops_early(self):
+        aligned = AlignedSequence('AGCGGCTTT' * 1000)
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGG')
+        enzyme_found, edit = next(WobbleCutDetector().iter_cuts(aligned,
+                                                               enzyme))
+        self.assertIs(enzyme_found, enzyme)
+        self.assertEqual(edit, SequenceReplacementEdit(
+            aligned, enzyme.sequence, 3))
+
+    def test_detect_cuts_max_bases_modified(self):
+        aligned = AlignedSequence('AGCGGCTTTGGG')
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGG')
+        detector = WobbleCutDetector()
+        actual_cuts = detector.detect_cuts(aligned, enzyme,
+                                           max_bases_modified=0)
+        self.assertEqual(actual_cuts, [
+            SequenceReplacementEdit(aligned, enzyme.sequence, 9)])
+
+    def test_detect_cuts_max_results(self):
+        aligned = AlignedSequence('AAAGGCTTTGGG')
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGG')
+        detector = WobbleCutDetector()
+        all_cuts = edit_scoring.rank_edits(
+            detector.detect_cuts(aligned, enzyme))
+        for max_results in range(len(all_cuts) + 2):
+            self.assertEqual(
+                detector.detect_cuts(aligned, enzyme,
+                                     max_results=max_results),
+                all_cuts[:max_results])
+
+    def test_amino_indexes_are_bounded(self):
+        aligned = AlignedSequence('AAAGGGTTT')
+        enzymes = [RestrictionEnzyme('enzyme_x', 'GGG'),
+                   RestrictionEnzyme('enzyme_y', 'AAA')]
+        detector = WobbleCutDetector()
+        first = detector.detect_cuts_multi(aligned, enzymes)
+        for length in range(1, wobble_cut_detector._MAX_AMINO_INDEXES + 2):
+            detector.detect_cuts_multi(
+                aligned, [RestrictionEnzyme('enzyme_n', 'N' * length)])
+        self.assertEqual(len(detector._amino_indexes),
+                         wobble_cut_detector._MAX_AMINO_INDEXES)
+        self.assertEqual(detector.detect_cuts_multi(aligned, enzymes), first)
+
+    def test_detect_cuts_by_context(self):
+        aligned = AlignedSequence('AAAGGCTTTGGG')
+        enzymes = [RestrictionEnzyme('enzyme_x', 'GGG')]
+        human = codons.load_context()
+        mouse = codons.load_context(usage_file_name='mouse')
+        encodings, _, usage_table = codons.get_state()
+        mito = codons.CodonContext(dict(encodings, TGA='W', TGG='W'),
+                                   usage_table)
+        detector = WobbleCutDetector()
+        for max_results in (None, 1):
+            all_cuts = detector.detect_cuts_by_context(
+                aligned, enzymes, [human, mouse, mito], max_results)
+            for context in (human, mouse, mito):
+                sequence = aligned.with_context(context)
+                expected = detector.detect_cuts_multi(sequence, enzymes,
+                                                      max_results)
+                self.assertEqual(
+                    [(str(e), e.get_original_sequence().context)
+                     for e in all_cuts[context][enzymes[0]]],
+                    [(str(e), context) for e in expected[enzymes[0]]])
+
+    def test_detect_protein_sites(self):
+        enzyme_x = RestrictionEnzyme('enzyme_x', 'GGATCC')
+        enzyme_y = RestrictionEnzyme('enzyme_y', 'AAAAAA')
+        # G S back-translates to GGA TCC
+        sites = WobbleCutDetector().detect_protein_sites(
+            'GSW', [enzyme_x, enzyme_y])
+        self.assertEqual(sites, {enzyme_x: [0], enzyme_y: []})
+
+    def test_detect_removals_no_site(self):
+        aligned = AlignedSequence('AAATTT')
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGG')
+        self.assertEqual(
+            WobbleCutDetector().detect_removals(aligned, enzyme), [])
+
+    def test_detect_removals(self):
+        # GGA TCC: the site can be broken by a swap in either codon
+        aligned = AlignedSequence('GGATCC')
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGATCC')
+        removals = WobbleCutDetector().detect_removals(aligned, enzyme)
+        self.assertEqual([offset for offset, _ in removals], [0])
+        edits = removals[0][1]
+        self.assertIn(
+            SequenceReplacementEdit(aligned, Sequence('GGC'), 0), edits)
+        self.assertIn(
+            SequenceReplacementEdit(aligned, Sequence('TCT'), 3), edits)
+        for edit in edits:
+            self.assertEqual(edit.get_number_of_aminos_modified(), 0)
+
+    def test_detect_removals_reverse_strand(self):
+        aligned = AlignedSequence('AAAGGGTTT')
+        enzyme = RestrictionEnzyme('enzyme_x', 'CCC')
+        removals = WobbleCutDetector().detect_removals(aligned, enzyme)
+        self.assertEqual([offset for offset, _ in removals], [3])
+
+    def test_detect_removals_avoids_new_panel_sites(self):
+        aligned = AlignedSequence('GGATCC')
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGATCC')
+        # GGA -> GGC would introduce a GGC site
+        panel = [enzyme, RestrictionEnzyme('enzyme_y', 'GGC')]
+        edits = WobbleCutDetector().detect_removals(aligned, enzyme,
+                                                    panel)[0][1]
+        self.assertNotIn(
+            SequenceReplacementEdit(aligned, Sequence('GGC'), 0), edits)
+        self.assertIn(
+            SequenceReplacementEdit(aligned, Sequence('TCT'), 3), edits)
+
+    def test_detect_removals_reuses_site_index(self):
+        aligned = AlignedSequence('GGATCCAAAGGGTTT')
+        enzymes = [RestrictionEnzyme('enzyme_x', 'GGATCC'),
+                   RestrictionEnzyme('enzyme_y', 'CCC')]
+        index = SiteIndex(aligned)
+        detector = WobbleCutDetector()
+        for enzyme in enzymes:
+            self.assertEqual(
+                detector.detect_removals(aligned, enzyme, enzymes,
+                                         site_index=index),
+                detector.detect_removals(aligned, enzyme, enzymes))
+
+    def test_detect_removals_by_context(self):
+        encodings, _, usage_table = codons.get_state()
+        mito = codons.CodonContext(dict(encodings, TGA='W', TGG='W'),
+                                   usage_table)
+        aligned = AlignedSequence('GGATCC', mito)
+        enzyme = RestrictionEnzyme('enzyme_x', 'GGATCC')
+        detector = WobbleCutDetector()
+        self.assertEqual(
+            [offset for offset, _ in detector.detect_removals(aligned,
+                                                              enzyme)], [0])
+        # the sites around each swap are found with the sequence's tables
+        self.assertEqual(set(context for _, context
+                             in detector._amino_indexes), {mito})
+
 
 if __name__ == '__main__':
     unittest.main()
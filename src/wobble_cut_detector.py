@@ -1,13 +1,35 @@
+from amino_index import AminoIndex
+from codon_lattice import CodonLattice
+from restriction_enzymes import RestrictionEnzyme
+from sequence import AlignedSequence
+from sequence import Sequence
 from sequence_edit import SequenceReplacementEdit
+from site_index import SiteIndex
+import codons
+import collections
+import edit_scoring
+import heapq
+import itertools
+
+# the number of offsets screened at a time by iter_cuts, which bounds its
+# working memory
+_ITER_WINDOW = 3 * 1024
+
+# the number of compiled AminoIndexes a detector keeps, so callers picking
+# many different enzyme subsets (e.g. server requests) don't grow it forever
+_MAX_AMINO_INDEXES = 32
 
 
 class WobbleCutDetector(object):
     """Detects wobble-enabled restriction enzyme cuts"""
 
     def __init__(self):
-        pass
+        # AminoIndexes, keyed by (tuple of RestrictionEnzymes, CodonContext),
+        # least recently used first
+        self._amino_indexes = collections.OrderedDict()
 
-    def detect_cuts(self, aligned_sequence, restriction_enzyme):
+    def detect_cuts(self, aligned_sequence, restriction_enzyme,
+                    max_results=None, max_bases_modified=None):
         """
         Returns a list of potential edits that enable the aligned sequence to
         be cut by a given restriction enzyme. Includes cuts matching the
@@ -15,30 +37,482 @@ class WobbleCutDetector(object):
 
         :param aligned_sequence: AlignedSequence
         :param restriction_enzyme: RestrictionEnzyme
+        :param max_results: if set, only the cheapest edits (fewest bases
+            modified, then lowest abs usage shift) are kept, and are returned
+            in that order. Costlier candidates are pruned during the search.
+        :param max_bases_modified: if set, edits modifying more bases are
+            skipped
         :return: List of SequenceReplacementEdit enabling an enzyme cut
         """
-        edit_list = []
-        primitive_cut_sequences = set()
-        for seq in restriction_enzyme.sequence.get_primitive_sequences():
-            primitive_cut_sequences.add(seq)
-            primitive_cut_sequences.add(seq.reverse_complement())
-        for cut_seq in primitive_cut_sequences:
-            edit_list += self._detect_cuts_one_way(aligned_sequence, cut_seq)
-        return edit_list
+        return self.detect_cuts_multi(
+            aligned_sequence, [restriction_enzyme], max_results,
+            max_bases_modified)[restriction_enzyme]
+
+    def detect_cuts_multi(self, aligned_sequence, restriction_enzymes,
+                          max_results=None, max_bases_modified=None,
+                          begin=0, end=None):
+        """
+        Detects cuts for several enzymes in a single pass over the sequence.
+        Equivalent to calling detect_cuts for each enzyme in turn.
+
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param max_results: max edits per enzyme (see detect_cuts)
+        :param max_bases_modified: max bases per edit (see detect_cuts)
+        :param begin: only sites starting from this offset are detected
+        :param end: only sites starting before this offset are detected
+            (defaults to the end)
+        :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit
+            (in the order of restriction_enzymes)
+        """
+        lattice = CodonLattice(aligned_sequence)
+        if max_results is None and max_bases_modified is None:
+            return self._collect_all(aligned_sequence, lattice,
+                                     restriction_enzymes, begin, end)
+        return self._collect_cheapest(
+            aligned_sequence, lattice, restriction_enzymes,
+            self._find_hits(lattice, restriction_enzymes, begin, end),
+            max_results, max_bases_modified)
+
+    def iter_cuts(self, aligned_sequence, restriction_enzymes):
+        """
+        Lazily detects cuts, yielding each edit as soon as it's found, so
+        callers can stream results or stop early (e.g. to ask whether any
+        cut exists). The sequence is screened a window at a time, so memory
+        doesn't grow with the number of cuts.
+
+        Yields the same edits as detect_cuts_multi (without limits), with
+        sites matching both strands listed once.
+
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzymes: RestrictionEnzyme, or list of
+            RestrictionEnzyme
+        :return: generator of (RestrictionEnzyme, SequenceReplacementEdit)
+            pairs, ordered by offset
+        """
+        if isinstance(restriction_enzymes, RestrictionEnzyme):
+            restriction_enzymes = [restriction_enzymes]
+        return self._iter_cuts(aligned_sequence,
+                               CodonLattice(aligned_sequence),
+                               restriction_enzymes)
+
+    def _iter_cuts(self, aligned_sequence, lattice, restriction_enzymes,
+                   begin=0, end=None):
+        """
+        :param aligned_sequence: AlignedSequence
+        :param lattice: CodonLattice of the aligned_sequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param begin: the first offset to check
+        :param end: the offset to stop checking at (defaults to the end)
+        :return: generator of (RestrictionEnzyme, SequenceReplacementEdit)
+            pairs, ordered by offset (see iter_cuts)
+        """
+        if end is None or end > len(lattice):
+            end = len(lattice)
+        for window_begin in range(begin, end, _ITER_WINDOW):
+            current_offset = None
+            edits = {}  # override bases -> edit, at the current offset
+            for offset, override, enzyme in self.detect_overrides(
+                    lattice, restriction_enzymes, window_begin,
+                    min(end, window_begin + _ITER_WINDOW)):
+                if offset != current_offset:
+                    current_offset = offset
+                    edits = {}
+                if override not in edits:
+                    edits[override] = SequenceReplacementEdit(
+                        aligned_sequence, Sequence(override), offset)
+                yield enzyme, edits[override]
+
+    def detect_removals(self, aligned_sequence, restriction_enzyme,
+                        panel=None, site_index=None):
+        """
+        Finds the sequence's existing cut-sites for an enzyme (on either
+        strand), and the synonymous codon swaps that eliminate each of them
+        without creating a new site for any enzyme in the panel. Only the
+        smallest sets of codons that work are swapped.
+
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzyme: RestrictionEnzyme to eliminate
+        :param panel: list of RestrictionEnzyme that mustn't gain sites
+            (defaults to the enzyme itself)
+        :param site_index: optional SiteIndex of the sequence, to reuse when
+            eliminating the sites of several enzymes
+        :return: list of (site offset, List of SequenceReplacementEdit)
+            tuples, ordered by offset, with each site's edits cheapest first
+            (see edit_scoring.rank_edits)
+        """
+        panel = list(panel or [restriction_enzyme])
+        if restriction_enzyme not in panel:
+            panel.append(restriction_enzyme)
+        if site_index is None:
+            site_index = SiteIndex(aligned_sequence)
+        assert site_index.bases == aligned_sequence.bases, \
+            'site_index must index the sequence'
+        offsets = sorted(set(
+            offset for cut_seq in (restriction_enzyme.sequence,
+                                   restriction_enzyme.sequence
+                                   .reverse_complement())
+            for offset in site_index.find(cut_seq.get_masks())))
+        removals = []
+        for offset in offsets:
+            edits = self._detect_removals_at(
+                aligned_sequence, restriction_enzyme, panel, offset)
+            removals.append((offset, edit_scoring.rank_edits(edits)))
+        return removals
+
+    def _detect_removals_at(self, aligned_sequence, restriction_enzyme,
+                            panel, offset):
+        """
+        :return: List of SequenceReplacementEdit eliminating the site at the
+            offset (see detect_removals)
+        """
+        bases = aligned_sequence.bases
+        context = aligned_sequence.context
+        first_codon = offset // 3
+        last_codon = (offset + len(restriction_enzyme) - 1) // 3
+        alternatives = {}
+        for codon_index in range(first_codon, last_codon + 1):
+            codon = bases[codon_index * 3:codon_index * 3 + 3]
+            alternatives[codon_index] = sorted(
+                synonym for synonym in context.get_synonyms(codon)
+                if synonym != codon and all(b in 'ACGT' for b in synonym))
+        max_len = max(len(enzyme) for enzyme in panel)
+        for swap_count in range(1, last_codon - first_codon + 2):
+            edits = []
+            for swapped in itertools.combinations(
+                    sorted(alternatives.keys()), swap_count):
+                for new_codons in itertools.product(
+                        *[alternatives[i] for i in swapped]):
+                    new_bases = list(
+                        bases[swapped[0] * 3:swapped[-1] * 3 + 3])
+                    for codon_index, new_codon in zip(swapped, new_codons):
+                        begin = (codon_index - swapped[0]) * 3
+                        new_bases[begin:begin + 3] = new_codon
+                    edit = SequenceReplacementEdit(
+                        aligned_sequence, Sequence(''.join(new_bases)),
+                        swapped[0] * 3)
+                    if self._removes_site(edit, restriction_enzyme, panel,
+                                          offset, max_len):
+                        edits.append(edit)
+            if edits:
+                return edits
+        return []
+
+    def _removes_site(self, edit, restriction_enzyme, panel, offset,
+                      max_len):
+        """
+        Whether an edit eliminates the enzyme's site at the offset without
+        creating any other site for the panel.
+        """
+        begin, end = edit.get_edit_range()
+        context = edit.get_original_sequence().context
+        # any site touching the edit lies within this (codon-aligned) window
+        window_begin = max(0, begin - max_len + 1)
+        window_begin -= window_begin % 3
+        window_end = min(len(edit.get_original_sequence()),
+                         end + max_len - 1)
+        window_end += -window_end % 3
+        old_sites = self._find_existing_sites(
+            edit.get_original_sequence().bases[window_begin:window_end],
+            panel, context)
+        new_sites = self._find_existing_sites(
+            edit.get_new_bases(window_begin, window_end), panel, context)
+        return (restriction_enzyme, offset - window_begin) not in new_sites \
+            and new_sites <= old_sites
+
+    def _find_existing_sites(self, aligned_bases, panel, context):
+        """
+        :param context: CodonContext the bases are read with
+        :return: set of (RestrictionEnzyme, offset) of the exact sites in a
+            string of aligned bases
+        """
+        lattice = CodonLattice(AlignedSequence(aligned_bases, context),
+                               synonymous=False)
+        return set((enzyme, offset) for offset, _, enzyme
+                   in self.detect_overrides(lattice, panel))
+
+    def detect_cuts_by_context(self, aligned_sequence, restriction_enzymes,
+                               contexts, max_results=None,
+                               max_bases_modified=None):
+        """
+        Detects cuts under several CodonContexts (e.g. organisms) at once.
+        Contexts sharing a genetic code have the same candidate edits, so
+        unless results are ranked by usage (max_results), each code is only
+        screened once.
+
+        :param aligned_sequence: AlignedSequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param contexts: list of CodonContext
+        :param max_results: max edits per enzyme (see detect_cuts)
+        :param max_bases_modified: max bases per edit (see detect_cuts)
+        :return: dict of CodonContext -> dict of RestrictionEnzyme -> List of
+            SequenceReplacementEdit, against the sequence under that context
+        """
+        all_cuts = {}
+        for context in contexts:
+            sequence = aligned_sequence.with_context(context)
+            screened = None
+            if max_results is None:
+                screened = next((other for other in all_cuts.keys()
+                                 if other.has_same_encodings(context)), None)
+            if screened is None:
+                all_cuts[context] = self.detect_cuts_multi(
+                    sequence, restriction_enzymes, max_results,
+                    max_bases_modified)
+                continue
+            all_cuts[context] = {enzyme: [
+                SequenceReplacementEdit(sequence,
+                                        Sequence(edit.get_override()),
+                                        edit.get_offset())
+                for edit in edits]
+                for enzyme, edits in all_cuts[screened].items()}
+        return all_cuts
+
+    def _get_amino_index(self, restriction_enzymes, context):
+        """
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param context: CodonContext
+        :return: AminoIndex for the enzymes and their reverse complements
+            (compiled once per enzyme list and context, while among the
+            _MAX_AMINO_INDEXES most recently used)
+        """
+        key = (tuple(restriction_enzymes), context)
+        if key in self._amino_indexes:
+            self._amino_indexes.move_to_end(key)
+        else:
+            patterns = [(enzyme, cut_seq.get_masks())
+                        for enzyme in restriction_enzymes
+                        for cut_seq in (enzyme.sequence,
+                                        enzyme.sequence.reverse_complement())]
+            # keyed by (enzyme, masks), so candidates name the pattern to
+            # check (palindromes are only listed once)
+            self._amino_indexes[key] = AminoIndex(
+                (((enzyme, masks), masks) for enzyme, masks in patterns),
+                context)
+            if len(self._amino_indexes) > _MAX_AMINO_INDEXES:
+                self._amino_indexes.popitem(last=False)
+        return self._amino_indexes[key]
+
+    def _find_hits(self, lattice, restriction_enzymes, begin=0, end=None):
+        """
+        Matches the enzymes' patterns against the lattice, only checking the
+        offsets and patterns allowed by the local aminos. (See AminoIndex)
+
+        :return: list of (offset, codon_fills, [RestrictionEnzyme]) tuples,
+            ordered by offset
+        """
+        hits = []
+        for offset, patterns in self._get_amino_index(
+                restriction_enzymes, lattice.context).find(lattice, begin,
+                                                           end):
+            for enzyme, masks in patterns:
+                codon_fills = lattice.get_codon_fills(masks, offset)
+                if codon_fills:
+                    hits.append((offset, codon_fills, [enzyme]))
+        return hits
+
+    def detect_protein_sites(self, aminos, restriction_enzymes,
+                             context=None):
+        """
+        Finds where enzyme sites could be placed in some back-translation of
+        a protein, before any DNA is designed.
+
+        :param aminos: iterable of amino names, as in the encodings (e.g. a
+            string of one-letter aminos)
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param context: CodonContext (defaults to the loaded tables)
+        :return: dict of RestrictionEnzyme -> sorted list of base offsets in
+            the back-translated sequence (in the order of restriction_enzymes)
+        :raises ValueError: if an amino isn't in the encodings
+        """
+        index = self._get_amino_index(
+            restriction_enzymes, context or codons.get_loaded_context())
+        sites = {enzyme: [] for enzyme in restriction_enzymes}
+        for offset, patterns in index.find_protein_sites(
+                index.get_protein_ids(aminos)):
+            for enzyme, _ in patterns:
+                # (both strands may fit)
+                if not sites[enzyme] or sites[enzyme][-1] != offset:
+                    sites[enzyme].append(offset)
+        return sites
+
+    def detect_overrides(self, lattice, restriction_enzymes, begin=0,
+                         end=None):
+        """
+        Low-level detection against a CodonLattice, without building edits.
+
+        :param lattice: CodonLattice of an AlignedSequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param begin: the first offset to check
+        :param end: the offset to stop checking at (defaults to the end)
+        :return: generator of (offset, override bases, RestrictionEnzyme)
+            tuples, ordered by offset (as in detect_cuts_multi)
+        """
+        current_offset = None
+        seen = {}  # enzyme -> override bases already listed at the offset
+        for offset, codon_fills, enzymes in self._find_hits(
+                lattice, restriction_enzymes, begin, end):
+            if offset != current_offset:
+                current_offset = offset
+                seen = {}
+            for fills in itertools.product(*codon_fills):
+                override = ''.join(fills)
+                for enzyme in enzymes:
+                    # a site can match both strands (e.g. palindromes)
+                    enzyme_seen = seen.setdefault(enzyme, set())
+                    if override in enzyme_seen:
+                        continue
+                    enzyme_seen.add(override)
+                    yield offset, override, enzyme
+
+    def _collect_all(self, aligned_sequence, lattice, restriction_enzymes,
+                     begin=0, end=None):
+        """
+        Builds an edit for every detected override.
+
+        :param aligned_sequence: AlignedSequence
+        :param lattice: CodonLattice of the aligned_sequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param begin: the first offset to check
+        :param end: the offset to stop checking at (defaults to the end)
+        :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit
+        """
+        edit_lists = {enzyme: [] for enzyme in restriction_enzymes}
+        for enzyme, edit in self._iter_cuts(aligned_sequence, lattice,
+                                            restriction_enzymes, begin, end):
+            edit_lists[enzyme].append(edit)
+        return edit_lists
 
     @staticmethod
-    def _detect_cuts_one_way(aligned_sequence, cut_seq):
+    def _collect_cheapest(aligned_sequence, lattice, restriction_enzymes,
+                          hits, max_results, max_bases_modified):
         """
-        Helper that detects edit-enabled cut-sites for the given inputs (without
-        considering the reverse complement).
+        Like _collect_all, but only keeps the cheapest edits per enzyme,
+        skipping overrides whose cost can't beat the edits already kept.
 
         :param aligned_sequence: AlignedSequence
-        :param cut_seq: Sequence from a RestrictionEnzyme of interest
-        :return: List of SequenceReplacementEdits enabling a cut
+        :param lattice: CodonLattice of the aligned_sequence
+        :param restriction_enzymes: list of RestrictionEnzyme
+        :param hits: pattern hits, ordered by offset (see _find_hits)
+        :param max_results: max edits per enzyme, or None
+        :param max_bases_modified: max bases per edit, or None
+        :return: dict of RestrictionEnzyme -> List of SequenceReplacementEdit
+        """
+        kept = {enzyme: _CheapestEdits(max_results, max_bases_modified)
+                for enzyme in restriction_enzymes}
+        current_offset = None
+        edits = {}  # override bases -> edit, at the current offset
+        seen = {}  # enzyme -> override bases already listed at the offset
+        for offset, codon_fills, enzymes in hits:
+            if offset != current_offset:
+                current_offset = offset
+                edits = {}
+                seen = {}
+            fill_costs = []
+            for i, fills in enumerate(codon_fills):
+                codon_index = offset // 3 + i
+                start = offset % 3 if i == 0 else 0
+                fill_costs.append([
+                    (fill,) + lattice.get_fill_cost(codon_index, start, fill)
+                    for fill in fills])
+
+            def accepts(bases_modified, usage_shift):
+                return any(kept[enzyme].accepts(bases_modified, usage_shift)
+                           for enzyme in enzymes)
+
+            for override, bases_modified, usage_shift in _cheap_overrides(
+                    fill_costs, accepts):
+                for enzyme in enzymes:
+                    # a site can match both strands (e.g. palindromes)
+                    enzyme_seen = seen.setdefault(enzyme, set())
+                    if override in enzyme_seen:
+                        continue
+                    enzyme_seen.add(override)
+                    if not kept[enzyme].accepts(bases_modified, usage_shift):
+                        continue
+                    if override not in edits:
+                        edits[override] = SequenceReplacementEdit(
+                            aligned_sequence, Sequence(override), offset)
+                    kept[enzyme].add(bases_modified, usage_shift,
+                                     edits[override])
+        return {enzyme: kept[enzyme].get_edits()
+                for enzyme in restriction_enzymes}
+
+
+def _cheap_overrides(fill_costs, accepts):
+    """
+    Enumerates the overrides of a hit in product order, skipping any branch
+    whose lowest possible cost isn't accepted.
+
+    :param fill_costs: per codon, a list of (fill, bases modified, abs usage
+        shift) tuples
+    :param accepts: function of (bases modified, abs usage shift) -> bool,
+        which may tighten as overrides are consumed
+    :return: generator of (override, bases modified, abs usage shift)
+    """
+    # the fewest bases that the remaining codons must modify
+    min_remaining = [0] * (len(fill_costs) + 1)
+    for i in range(len(fill_costs) - 1, -1, -1):
+        min_remaining[i] = min_remaining[i + 1] \
+                           + min(cost[1] for cost in fill_costs[i])
+
+    def walk(i, prefix, bases_modified, usage_shift):
+        if not accepts(bases_modified + min_remaining[i], usage_shift):
+            return
+        if i == len(fill_costs):
+            yield prefix, bases_modified, usage_shift
+            return
+        for fill, fill_bases, fill_shift in fill_costs[i]:
+            yield from walk(i + 1, prefix + fill, bases_modified + fill_bases,
+                            usage_shift + fill_shift)
+
+    return walk(0, '', 0, 0)
+
+
+class _CheapestEdits(object):
+    """The cheapest edits found so far for one enzyme (see detect_cuts)."""
+
+    def __init__(self, max_results, max_bases_modified):
+        """
+        :param max_results: the number of edits to keep, or None for all
+        :param max_bases_modified: max bases per edit, or None
+        """
+        self._max_results = max_results
+        self._max_bases_modified = max_bases_modified
+        # max-heap of (-bases, -shift, -order, edit), worst edit first
+        self._heap = []
+        self._order = itertools.count()
+
+    def accepts(self, bases_modified, usage_shift):
+        """
+        Whether an edit of this cost (found after all those already added)
+        would be kept.
+        """
+        if self._max_bases_modified is not None \
+                and bases_modified > self._max_bases_modified:
+            return False
+        if self._max_results is not None \
+                and len(self._heap) >= self._max_results:
+            if not self._heap:
+                return False
+            worst_bases, worst_shift = -self._heap[0][0], -self._heap[0][1]
+            return (bases_modified, usage_shift) < (worst_bases, worst_shift)
+        return True
+
+    def add(self, bases_modified, usage_shift, edit):
+        """Keeps an edit, dropping the worst kept edit if over capacity."""
+        heapq.heappush(self._heap, (-bases_modified, -usage_shift,
+                                    -next(self._order), edit))
+        if self._max_results is not None \
+                and len(self._heap) > self._max_results:
+            heapq.heappop(self._heap)
+
+    def get_edits(self):
+        """
+        :return: the kept edits, cheapest first if max_results is set (and
+            in the order found otherwise)
         """
-        edit_list = []
-        for offset in range(len(aligned_sequence) - len(cut_seq) + 1):
-            edit = SequenceReplacementEdit(aligned_sequence, cut_seq, offset)
-            if edit.get_number_of_aminos_modified() == 0:
-                edit_list.append(edit)
-        return edit_list
+        entries = sorted(self._heap, key=lambda entry: entry[2], reverse=True)
+        if self._max_results is not None:
+            entries.sort(key=lambda entry: (-entry[0], -entry[1]))
+        return [entry[3] for entry in entries]